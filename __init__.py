@@ -3,19 +3,24 @@
 from bpy.props import StringProperty, BoolProperty
 from bpy.types import Operator
 from bpy.utils import register_class, unregister_class
-from collections import namedtuple
-from math import ceil, sqrt
+from bisect import bisect_left
+from collections import deque
 from pathlib import Path
 from shlex import split
-from subprocess import run, PIPE
+from subprocess import Popen, PIPE, STDOUT
+from threading import Lock, Thread
+from time import perf_counter, time
 import bpy
+import json
 import logging
 import os
 import re
+import signal
 import sys
 
+from bpy.app.handlers import persistent
 from bpy.path import abspath
-from bpy.props import IntProperty, StringProperty, BoolProperty
+from bpy.props import FloatProperty, IntProperty, StringProperty, BoolProperty
 from bpy.types import SequenceEditor, Scene
 
 
@@ -32,222 +37,278 @@ internal_blend = re.compile('\w+\.blend')
 current_dir = os.path.dirname(internal_blend.split(__file__)[0])
 sys.path.append(current_dir)
 
+from planner import (
+    BoardReport,
+    board_ids,
+    CalibratedTimingModel,
+    ChannelIndex,
+    FrameIndex,
+    LayoutReport,
+    SyllableTimingModel,
+    calibrate_rates,
+    default_timing_model,
+    file_vse_scenes,
+    iter_fountain,
+    card_height,
+    card_width,
+    parse_episodes,
+    plan_board,
+    plan_episodes,
+    plan_layout,
+    plan_scene,
+    relayout_plan,
+    scene_fingerprint,
+    scene_frame_spans,
+    script_index,
+    strip_dialogue,
+    to_frames_scenes,
+)
+
+# style: location x, location y, vertical alignment, wrap width
+strip_styles = {
+    'scene': (0.5, 0.9, 'TOP', 0.85),
+    'dialogue': (0.5, 0.1, 'BOTTOM', 0.85),
+    'action': (0.5, 0.5, 'CENTER', 0.85),
+    'dual_left': (0.27, 0.1, 'BOTTOM', 0.42),
+    'dual_right': (0.73, 0.1, 'BOTTOM', 0.42),
+}
 
-spaces = re.compile(r'\s+')
-words_per_second = 3.75
-text_speed_factor = 1.2
-min_text_length = 1.5
-line_break_seconds = 0.3
-scene_padding_seconds = 1
+def channel_index():
+    scene = bpy.context.scene
 
-Scene = namedtuple('Scene', ['name', 'elements'])
-Dialogue = namedtuple(
-    'Dialogue', ['seconds', 'character', 'parenthetical', 'text'])
-Action = namedtuple('Action', ['seconds', 'text'])
+    if not scene.sequence_editor:
+        scene.sequence_editor_create()
 
-card_width = 600
-card_height = 300
-card_margin = 50
+    return ChannelIndex(scene.sequence_editor.sequences)
 
 
-def to_frames_scenes(script):
-    from fountain import Fountain
+def remove_strips(index, strips):
+    # there is no bulk removal in the RNA API, but the strips are gathered
+    # from the index in one go instead of rescanning every sequence
+    sequences = bpy.context.scene.sequence_editor.sequences
+    index.discard(strips)
+    for s in strips:
+        sequences.remove(s)
 
-    Scene = namedtuple('Scene', ['name', 'beats'])
-    Beat = namedtuple('Beat', ['name', 'lines'])
 
-    F = Fountain(script)
+def find_empty_channel(index=None):
+    unfurl_channel = bpy.context.scene.unfurl_channel
+    index = index or channel_index()
 
-    scenes = []
+    if unfurl_channel > 0:
+        remove_strips(index, index.strips_in(unfurl_channel, unfurl_channel + 2))
+        return unfurl_channel
 
-    current_scene = None
+    # the unfurl strips take three channels: scenes, dialogues and actions
+    return index.first_free_band(3)
 
-    current_scene = None
-    current_beat = None
 
-    for fc, f in enumerate(F.elements):
-        element_type = f.element_type
-        text = f.element_text.strip()
+def scene_fps(scene):
+    render = scene.render
+    return render.fps / render.fps_base
 
-        if element_type == 'Scene Heading':
 
-            name = f.original_content.strip()
-            current_scene = Scene(name, [])
-            scenes.append(current_scene)
-            current_beat = None
+# scene name -> (stored layout, decoded layout), so lookups do not decode it every time
+loaded_layouts = {}
+# scene name -> (source text name, FrameIndex and links of the strips unfurled
+# from it), dropped whenever the layout is stored again
+frame_indexes = {}
 
-        elif not current_scene:
-            continue
 
-        elif element_type == 'Section Heading':
-            if f.section_depth < 2:
-                continue
+def load_layout(scene):
+    stored = scene.unfurl_layout
+    cached = loaded_layouts.get(scene.name)
+    if cached and cached[0] == stored:
+        return cached[1]
 
-            current_beat = Beat(text, [])
-            current_scene.beats.append(current_beat)
+    try:
+        layout = json.loads(stored)
+    except ValueError:
+        layout = None
 
-        elif element_type == 'Synopsis':
-            current_beat = Beat(text, [])
-            current_scene.beats.append(current_beat)
+    loaded_layouts[scene.name] = (stored, layout)
+    return layout
 
-        elif element_type == 'Empty Line' and not current_beat:
-            continue
 
-        else:
-            if not current_beat:
-                current_beat = Beat('', [])
-                current_scene.beats.append(current_beat)
-            current_beat.lines.append(text)
+def store_layout(scene, channel, scenes, spans, fps, source=''):
+    frame_indexes.pop(scene.name, None)
+    scene.unfurl_layout = json.dumps({
+        'channel': channel,
+        'fps': fps,
+        'source': source,
+        'scenes': [
+            [scene_fingerprint(s), start, end]
+            for s, (start, end) in zip(scenes, spans)
+        ]
+    })
 
-    return scenes
 
+def forget_layout(scene):
+    '''Drop the stored layout once the strips no longer match it'''
+    frame_indexes.pop(scene.name, None)
+    scene.unfurl_layout = ''
 
-def text_to_seconds(text):
-    words = len(spaces.split(text))
-    return max(min_text_length, round(words / words_per_second + line_break_seconds * text.count('\n'), 2))
 
+def can_relayout(scene, layout, fps):
+    if not layout:
+        return False
 
-def find_empty_channel():
-    context = bpy.context
+    return (
+        scene.unfurl_channel in (0, layout['channel']) and
+        layout['fps'] == fps
+    )
 
-    scene = context.scene
-    unfurl_channel = scene.unfurl_channel
 
-    if not context.scene.sequence_editor:
-        context.scene.sequence_editor_create()
+def lay_out_scenes(scenes, incremental=False, source='', lookup=None):
+    started = perf_counter()
 
-    sequences = context.scene.sequence_editor.sequences
+    scene = bpy.context.scene
+    fps = scene_fps(scene)
+    spans = scene_frame_spans(scenes, fps)
+    layout = incremental and load_layout(scene)
 
-    if unfurl_channel > 0:
-        if sequences:
-            ss = [s for s in sequences if s.channel >=
-                  unfurl_channel and s.channel <= unfurl_channel + 2]
-            for s in ss:
-                sequences.remove(s)
+    index = channel_index()
 
-        return unfurl_channel
+    if can_relayout(scene, layout, fps):
+        channel = layout['channel']
+        created, kept = relayout_scenes(
+            scenes, spans, channel, layout['scenes'], index)
+        if lookup:
+            for i, j, strips in kept:
+                relink_strips(strips, lookup, j)
+    else:
+        channel = find_empty_channel(index)
+        created = range(len(scenes))
 
-    if not sequences:
-        return 1
+    planning = perf_counter()
+    specs = [
+        spec for j in created
+        for spec in plan_scene(scenes[j], channel, spans[j][0], fps, index=j)
+    ]
+    planned = perf_counter() - planning
 
-    channels = [s.channel for s in sequences]
-    channels = sorted(list(set(channels)))
-    return channels[-1] + 1
+    create_strips(specs, lookup, source)
+    store_layout(scene, channel, scenes, spans, fps, source)
 
+    return LayoutReport(len(specs), planned, perf_counter() - started - planned)
 
-def seconds_to_frames(seconds):
-    render = bpy.context.scene.render
-    return ceil((render.fps / render.fps_base) * seconds)
 
+def relayout_scenes(scenes, spans, channel, previous, index):
+    """Remove and shift the strips of a previous layout.
 
-def to_vse_scenes(script):
+    Returns the indexes of the scenes to create, and the previous index, new
+    index and strips of the scenes that were kept.
+    """
 
-    from fountain import Fountain
+    strips = sorted(
+        index.strips_in(channel, channel + 2),
+        key=lambda s: s.frame_final_start)
+    starts = [s.frame_final_start for s in strips]
+
+    def owned(start, end):
+        return strips[bisect_left(starts, start):bisect_left(starts, end)]
 
-    F = Fountain(script)
-    scenes = []
+    created, planned, removed_spans = relayout_plan(previous, scenes, spans)
 
-    current_scene = None
-    current_char = None
-    current_parenthetical = ''
+    removed = [s for start, end in removed_spans for s in owned(start, end)]
+    shifted = []
+    kept = []
 
-    for fc, f in enumerate(F.elements):
-        element_type = f.element_type
-        text = f.element_text.strip()
+    for i, j, delta in planned:
+        scene_strips = owned(*previous[i][1:3])
+        kept.append((i, j, scene_strips))
+        if delta:
+            shifted.extend((delta, s) for s in scene_strips)
 
-        if element_type == 'Scene Heading':
-            name = f.original_content.strip()
-            current_scene = Scene(name, [])
-            scenes.append(current_scene)
+    remove_strips(index, removed)
 
-        elif not current_scene:
-            continue
+    # move strips in an order that never makes them overlap a neighbour
+    # that has not been moved yet, or Blender would shuffle them to other channels
+    backward = sorted((m for m in shifted if m[0] < 0),
+                      key=lambda m: m[1].frame_final_start)
+    forward = sorted((m for m in shifted if m[0] > 0),
+                     key=lambda m: -m[1].frame_final_start)
+    for delta, s in backward + forward:
+        s.frame_start += delta
 
-        elif element_type == 'Parenthetical':
-            current_parenthetical = text
+    return created, kept
 
-        elif element_type == 'Character':
-            current_char = text
 
-        elif element_type == 'Dialogue':
-            seconds = text_to_seconds(text) * text_speed_factor
-            current_scene.elements.append(
-                Dialogue(
-                    seconds,
-                    current_char,
-                    current_parenthetical,
-                    text
-                ))
-            current_parenthetical = ''
+syllable_timing_model = SyllableTimingModel()
 
-        elif current_scene and element_type == 'Action':
-            seconds = text_to_seconds(text)
-            current_scene.elements.append(Action(seconds, text))
+# scene name -> (stored rates, model), so rates are only decoded when they change
+calibrated_models = {}
 
-    return scenes
 
+def timing_model(scene):
+    if scene.unfurl_timing_model == 'SYLLABLES':
+        return syllable_timing_model
 
-def lay_out_scenes(scenes):
-    next = 0
-    channel = find_empty_channel()
+    if scene.unfurl_timing_model == 'CALIBRATED':
+        rates = scene.unfurl_character_rates
+        cached = calibrated_models.get(scene.name)
+        if not cached or cached[0] != rates:
+            cached = calibrated_models[scene.name] = (
+                rates, CalibratedTimingModel(json.loads(rates or '{}')))
+        return cached[1]
+
+    return default_timing_model
+
+
+def describe_layout(report):
+    return 'Created {} strips (planning {:.2f}s, strips {:.2f}s)'.format(*report)
+
+
+def link_strip(strip, lookup, scene, element):
+    '''Point a strip back to the scene and line of the script it was unfurled from'''
+    strip['unfurl_scene'] = lookup.scene_ids[scene]
+    strip['unfurl_element'] = -1 if element is None else element
+    strip['unfurl_line'] = lookup.line_of(scene, element)
 
-    for i, s in enumerate(scenes):
-        total = scene_padding_seconds
-
-        for e in s.elements:
-            start = total
-            end = total + e.seconds
-
-            element_type = type(e)
-            if element_type is Dialogue:
-                strip = create_strip(
-                    channel + 1,
-                    start + next,
-                    end + next,
-                    '{}{}: {}'.format(e.character, (
-                        e.parenthetical and ' ' + e.parenthetical),
-                        e.text)
-                )
-
-                strip.location.y = 0.1
-                strip.align_y = 'BOTTOM'
-
-            elif element_type is Action:
-                strip = create_strip(channel + 2, start +
-                                     next, end + next, e.text)
-                strip.location.y = 0.5
-                strip.align_y = 'CENTER'
-
-            total = end
-
-        total += scene_padding_seconds
-        end = next + total
-
-        strip = create_strip(channel, next, next + total, s.name)
-        strip.location.y = 0.9
-        strip.align_y = 'TOP'
-        next = end
-
-
-def create_strip(channel, start, end, text):
-    frame_start = seconds_to_frames(start)
-    frame_end = seconds_to_frames(end)
-
-    strip = bpy.context.scene.sequence_editor.sequences.new_effect(
-        name=text,
-        type='TEXT',
-        channel=channel,
-        frame_start=frame_start,
-        frame_end=frame_end
-    )
 
-    strip.font_size = int(bpy.context.scene.render.resolution_y/18)
-    strip.use_shadow = True
-    strip.select = True
-    strip.wrap_width = 0.85
-    strip.text = text
-    strip.blend_type = 'ALPHA_OVER'
-    return strip
+def relink_strips(strips, lookup, scene):
+    # the scene is unchanged, but lines above it may have been added or removed
+    for s in strips:
+        element = s.get('unfurl_element')
+        if element is not None:
+            link_strip(s, lookup, scene, None if element < 0 else element)
+
+
+def create_strips(specs, lookup=None, source=''):
+    scene = bpy.context.scene
+    sequences = scene.sequence_editor.sequences
+    font_size = int(scene.render.resolution_y/18)
+    strips = []
+
+    for spec in specs:
+        strip = sequences.new_effect(
+            name=spec.text,
+            type='TEXT',
+            channel=spec.channel,
+            frame_start=spec.frame_start,
+            frame_end=spec.frame_end
+        )
+
+        location_x, location_y, align_y, wrap_width = strip_styles[spec.style]
+        strip.font_size = font_size
+        strip.use_shadow = True
+        strip.select = True
+        strip.wrap_width = wrap_width
+        strip.text = spec.text
+        strip.blend_type = 'ALPHA_OVER'
+        strip.location.x = location_x
+        strip.location.y = location_y
+        strip.align_y = align_y
+        if lookup and spec.scene is not None:
+            strip['unfurl_source'] = source
+            link_strip(strip, lookup, spec.scene, spec.element)
+        if spec.character is not None:
+            # the text alone cannot tell a parenthetical from a (V.O.) extension
+            strip['unfurl_character'] = spec.character
+            strip['unfurl_parenthetical'] = spec.parenthetical or ''
+        strips.append(strip)
+
+    return strips
 
 
 class UNFURL_FOUNTAIN_OT_match_strip_titles(Operator):
@@ -265,38 +326,152 @@ class UNFURL_FOUNTAIN_OT_match_strip_titles(Operator):
         return {'FINISHED'}
 
 
-class UNFURL_FOUNTAIN_OT_echo_title_to_strip(Operator):
-    '''Echo title to selected strips (from makefile)'''
-    bl_idname = "unfurl.echo_title_to_strip"
-    bl_label = "Replace text with echo title from makefile"
+# (make target, working directory) -> (output, time it was made, makefile mtime)
+make_outputs = {}
+
+
+def makefile_mtime(cwd):
+    # the names make looks for, in its order
+    for name in ('GNUmakefile', 'makefile', 'Makefile'):
+        try:
+            return os.stat(os.path.join(cwd, name)).st_mtime
+        except OSError:
+            continue
+    return None
+
+
+def cached_make_output(target, cwd, ttl):
+    cached = make_outputs.get((target, cwd))
+    if not cached:
+        return None
+
+    output, made, mtime = cached
+    if time() - made >= ttl or mtime != makefile_mtime(cwd):
+        return None
+
+    return output
+
+
+def kill_session(process):
+    '''Kill a process started in a session of its own, along with what it spawned'''
+    if process.poll() is not None:
+        return
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+class EchoFromMake:
+    '''Replace the text of the selected strips with the output of a make target
+
+    Make runs in the background and the output is cached for the scene's
+    `unfurl_make_ttl` seconds, or until the makefile changes.
+    '''
+
+    make_target = None
+    make_timeout = 10
 
     def execute(self, context):
-        title = run(['make', 'echo-title'],
-                    stdout=PIPE).stdout.decode('utf-8').strip()
-        if context.selected_sequences:
-            for s in context.selected_sequences:
-                if s.type != 'TEXT':
-                    continue
-                s.text = title
+        self.strips = [s.name for s in context.selected_sequences or () if s.type == 'TEXT']
+        self.cwd = os.getcwd()
+
+        output = cached_make_output(
+            self.make_target, self.cwd, context.scene.unfurl_make_ttl)
+        if output is not None:
+            self.apply(context, output)
+            return {'FINISHED'}
+
+        self.mtime = makefile_mtime(self.cwd)
+        try:
+            # in a session of its own, so a timeout also stops the recipes
+            # holding the pipe open
+            self.process = Popen(
+                ['make', self.make_target], cwd=self.cwd, stdout=PIPE, stderr=STDOUT,
+                encoding='utf-8', errors='replace', start_new_session=True)
+        except OSError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+
+        # make can print more than a pipe holds, so its output is drained as it comes
+        self.output = None
+        self.reader = Thread(target=self.read, daemon=True)
+        self.reader.start()
+
+        self.started = perf_counter()
+        wm = context.window_manager
+        self.timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.finish(context)
+            self.report({'WARNING'}, 'make {} cancelled'.format(self.make_target))
+            return {'CANCELLED'}
 
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        if self.reader.is_alive():
+            if perf_counter() - self.started < self.make_timeout:
+                return {'PASS_THROUGH'}
+
+            self.finish(context)
+            self.report({'ERROR'}, 'make {} timed out after {}s'.format(
+                self.make_target, self.make_timeout))
+            return {'CANCELLED'}
+
+        self.finish(context)
+        output = self.output.strip()
+
+        if self.process.returncode:
+            # the last lines are where make and the recipe say what went wrong
+            self.report({'ERROR'}, '\n'.join(output.splitlines()[-5:]) or
+                        'make {} failed'.format(self.make_target))
+            return {'CANCELLED'}
+
+        make_outputs[self.make_target, self.cwd] = (output, time(), self.mtime)
+        self.apply(context, output)
         return {'FINISHED'}
 
+    def read(self):
+        self.output = self.process.communicate()[0]
+
+    def finish(self, context):
+        context.window_manager.event_timer_remove(self.timer)
+        kill_session(self.process)
+        self.reader.join()
+
+    def apply(self, context, output):
+        if not self.strips:
+            return
+
+        # strips are looked up again, they may have gone while make was running
+        sequences = context.scene.sequence_editor.sequences_all
+        for name in self.strips:
+            strip = sequences.get(name)
+            if strip:
+                strip.text = output
+
+
+class UNFURL_FOUNTAIN_OT_echo_title_to_strip(EchoFromMake, Operator):
+    '''Echo title to selected strips (from makefile)'''
+    bl_idname = "unfurl.echo_title_to_strip"
+    bl_label = "Replace text with echo title from makefile"
+
+    make_target = 'echo-title'
+
 
-class UNFURL_FOUNTAIN_OT_echo_ddate_to_strip(Operator):
+class UNFURL_FOUNTAIN_OT_echo_ddate_to_strip(EchoFromMake, Operator):
     '''Echo discordian date to selected strips (from makefile)'''
     bl_idname = "unfurl.echo_ddate_to_strip"
     bl_label = "Replace text with echo discordian date from makefile"
 
-    def execute(self, context):
-        ddate = run(['make', 'echo-ddate'],
-                    stdout=PIPE).stdout.decode('utf-8').strip()
-        if context.selected_sequences:
-            for s in context.selected_sequences:
-                if s.type != 'TEXT':
-                    continue
-                s.text = ddate
-
-        return {'FINISHED'}
+    make_target = 'echo-ddate'
 
 
 class UNFURL_REPLACE_TEXT_OT_replace_text_for_strip(Operator):
@@ -320,6 +495,170 @@ class UNFURL_REPLACE_TEXT_OT_replace_text_for_strip(Operator):
         return {'FINISHED'}
 
 
+class ExportJob:
+    '''Writes an export and runs its command off the main thread, keeping the last lines they print
+
+    The contents are either a string or an iterable of strings, streamed to the file.
+    '''
+
+    log_lines = 200
+
+    # file path -> lock; a cancelled job may still be writing, the next one
+    # for the same file waits for it
+    write_locks = {}
+
+    def __init__(self, contents, filepath=None, command=None, cwd=None):
+        self.contents = contents
+        self.filepath = filepath
+        self.command = command
+        self.cwd = cwd
+        self.lines = deque(maxlen=self.log_lines)
+        self.status = 'RUNNING'
+        self.process = None
+        self.lock = Lock()
+        self.thread = Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def run(self):
+        try:
+            if self.filepath:
+                with self.write_locks.setdefault(self.filepath, Lock()):
+                    if self.status != 'RUNNING':
+                        return
+                    with open(self.filepath, 'w', encoding='utf-8') as o:
+                        if isinstance(self.contents, str):
+                            o.write(self.contents)
+                        else:
+                            o.writelines(self.contents)
+                self.lines.append('Wrote {}'.format(self.filepath))
+
+            if self.command:
+                with self.lock:
+                    if self.status != 'RUNNING':
+                        return
+                    # in a session of its own, so cancelling also stops what it spawns
+                    self.process = Popen(
+                        self.command, cwd=self.cwd, stdout=PIPE, stderr=STDOUT,
+                        encoding='utf-8', errors='replace', start_new_session=True)
+
+                for line in self.process.stdout:
+                    self.lines.append(line.rstrip('\n'))
+                self.process.wait()
+
+                if self.process.returncode:
+                    self.lines.append('Exited with {}'.format(self.process.returncode))
+                    self.finish('FAILED')
+                    return
+
+            self.finish('DONE')
+        except Exception as e:
+            # the panel is the only place a background failure shows up
+            self.lines.append('{}: {}'.format(type(e).__name__, e))
+            self.finish('FAILED')
+            # nothing drains the pipe any more, so the command cannot be left running
+            if self.process:
+                kill_session(self.process)
+                self.process.wait()
+
+    def finish(self, status):
+        with self.lock:
+            if self.status == 'RUNNING':
+                self.status = status
+
+    def cancel(self):
+        with self.lock:
+            if self.status != 'RUNNING':
+                return
+            self.status = 'CANCELLED'
+            if self.process:
+                kill_session(self.process)
+
+    def running(self):
+        return self.thread.is_alive()
+
+
+# target -> the latest export to it, an earlier one still running for the
+# same target is cancelled
+export_jobs = {}
+
+
+def start_export(target, job):
+    previous = export_jobs.pop(target, None)
+    if previous:
+        previous.cancel()
+
+    export_jobs[target] = job
+    job.start()
+    if not bpy.app.timers.is_registered(watch_export):
+        bpy.app.timers.register(watch_export)
+
+
+def watch_export():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'SEQUENCE_EDITOR':
+                area.tag_redraw()
+
+    # one last redraw once the job is over, so the panel shows how it ended
+    return 0.2 if any(job.running() for job in export_jobs.values()) else None
+
+
+class UNFURL_FOUNTAIN_OT_cancel_export(Operator):
+    '''Cancel a running text strips export, or all of them'''
+    bl_idname = "unfurl.cancel_export"
+    bl_label = "Cancel export"
+
+    target: StringProperty(name='Target', description='Export to cancel, all of them when empty')
+
+    @classmethod
+    def poll(cls, context):
+        return any(job.status == 'RUNNING' for job in export_jobs.values())
+
+    def execute(self, context):
+        for target, job in export_jobs.items():
+            if target == self.target or not self.target:
+                job.cancel()
+        return {'FINISHED'}
+
+
+class UNFURL_FOUNTAIN_PT_export(bpy.types.Panel):
+    """Output of the last text strips export to each target"""
+    bl_label = "Unfurl export"
+    bl_space_type = 'SEQUENCE_EDITOR'
+    bl_region_type = 'UI'
+    bl_category = "Unfurl"
+
+    @classmethod
+    def poll(cls, context):
+        return bool(export_jobs)
+
+    def draw(self, context):
+        for target, job in export_jobs.items():
+            box = self.layout.box()
+            row = box.row(align=True)
+            row.label(text='{}: {}'.format(os.path.basename(target), job.status.capitalize()))
+            if job.status == 'RUNNING':
+                row.operator("unfurl.cancel_export", text='', icon='CANCEL').target = target
+
+            column = box.column(align=True)
+            for line in list(job.lines)[-20:]:
+                column.label(text=line)
+
+
+def strip_fragment(text, split_dialogues):
+    if split_dialogues and re.match(r'^[A-Z ]+:', text):
+        return '\n'.join([s.strip() for s in text.split(':', 1)])
+    return text
+
+
+# (target, split dialogues) -> {strip name: (strip text, fragment)} of the last export
+export_fragments = {}
+# target -> ((contents, file path, command, cwd), job) of the last export
+last_exports = {}
+
+
 class UNFURL_FOUNTAIN_OT_concatenate_text_strips(Operator):
     '''The text strip from the text strips'''
     bl_idname = "unfurl.concatenate_text_strips"
@@ -331,42 +670,97 @@ class UNFURL_FOUNTAIN_OT_concatenate_text_strips(Operator):
     target: StringProperty(name='To file')
     shell_command: StringProperty(name='Command')
     shell_context: StringProperty(name='CWD', default='//', subtype='DIR_PATH')
+    print_text: BoolProperty(name='Print to console', default=False)
 
     def invoke(self, context, event):
         wm = context.window_manager
         return wm.invoke_props_dialog(self)
 
     def execute(self, context):
+        text_name = self.target.strip()
+
+        # only strips whose text changed since the last export are rendered again
+        previous = export_fragments.get((text_name, self.split_dialogues), {})
+        fragments = {}
         result = []
         if context.selected_sequences:
             for s in sorted(context.selected_sequences, key=lambda s: (s.frame_final_start, s.channel)):
                 if s.type != 'TEXT':
                     continue
                 text = s.text
-                if self.split_dialogues and re.match(r'^[A-Z ]+:', text):
-                    text = '\n'.join([s.strip() for s in text.split(':', 1)])
+                fragment = previous.get(s.name)
+                if not fragment or fragment[0] != text:
+                    fragment = (text, strip_fragment(text, self.split_dialogues))
 
-                result.append(text)
+                fragments[s.name] = fragment
+                result.append(fragment[1])
 
-        text_name = self.target.strip()
+        export_fragments[text_name, self.split_dialogues] = fragments
         sum = '\n\n'.join(result)
 
         text = bpy.data.texts.get(text_name)
         if not text:
             text = bpy.data.texts.new(text_name)
 
-        print('Completed:\n', sum)
+        if self.print_text:
+            print('Completed:\n', sum)
 
-        text.clear()
-        text.write(sum)
+        if text.as_string() != sum:
+            text.clear()
+            text.write(sum)
 
-        if self.save_target:
-            filepath = abspath(text.filepath or text.name_full)
-            with open(filepath, 'w') as o:
-                o.write(text.as_string())
+        export = (
+            sum,
+            abspath(text.filepath or text.name_full) if self.save_target else None,
+            split(self.shell_command) if self.shell_command else None,
+            abspath(self.shell_context)
+        )
 
-        if self.shell_command:
-            r = run(split(self.shell_command), cwd=abspath(self.shell_context))
+        last = last_exports.get(text_name)
+        if last and last[0] == export and last[1].status == 'DONE' and (
+                not export[1] or os.path.isfile(export[1])):
+            self.report({'INFO'}, 'Nothing changed since the last export')
+            return {'FINISHED'}
+
+        # writing the file and running the command happen in the background
+        job = ExportJob(*export)
+        last_exports[text_name] = (export, job)
+        start_export(export[1] or text_name, job)
+
+        return {'FINISHED'}
+
+
+class UNFURL_FOUNTAIN_OT_strips_to_fountain(Operator):
+    '''Write the unfurled text strips back out as a fountain script, following their channels'''
+    bl_idname = "unfurl.strips_to_fountain"
+    bl_label = "Write strips to fountain"
+
+    filepath: StringProperty(name='File', subtype='FILE_PATH')
+    filter_glob: StringProperty(default='*.fountain', options={'HIDDEN'})
+    channel: IntProperty(
+        name='Scene channel', description='Channel of the scene strips, 0 for the last unfurled one', default=0, min=0)
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        scene = context.scene
+        layout = load_layout(scene)
+        channel = self.channel or (layout and layout['channel']) or scene.unfurl_channel
+        if not channel:
+            self.report({"ERROR"}, "No scene channel to write from")
+            return {"CANCELLED"}
+
+        # strips are read here, on the main thread, and written out in the background
+        strips = [
+            (s.frame_final_start, s.channel, s.text,
+             s.get('unfurl_character'), s.get('unfurl_parenthetical'))
+            for s in channel_index().strips_in(channel, channel + 2) if s.type == 'TEXT'
+        ]
+        path = abspath(self.filepath)
+        start_export(path, ExportJob(iter_fountain(strips, channel), path))
+        self.report({'INFO'}, 'Writing {} strips to {}'.format(len(strips), self.filepath))
 
         return {'FINISHED'}
 
@@ -395,6 +789,179 @@ class UNFURL_FOUNTAIN_OT_clear_markers(Operator):
         return {'FINISHED'}
 
 
+class UNFURL_FOUNTAIN_OT_calibrate_reading_speed(Operator):
+    '''Learn the reading speed of each character from the selected dialogue strips'''
+    bl_idname = 'unfurl.calibrate_reading_speed'
+    bl_label = 'Calibrate reading speed from strips'
+
+    def execute(self, context):
+        scene = context.scene
+        fps = scene_fps(scene)
+        layout = load_layout(scene)
+        channel = (layout and layout['channel']) or scene.unfurl_channel
+        samples = []
+
+        for s in context.selected_sequences or []:
+            if s.type != 'TEXT':
+                continue
+            # the stamped character keeps extensions such as (V.O.), which the
+            # text alone reads as a parenthetical
+            character = s.get('unfurl_character')
+            if character is None and channel and s.channel != channel + 1:
+                continue
+            dialogue = strip_dialogue(s.text, character, s.get('unfurl_parenthetical'))
+            if not dialogue:
+                continue
+            samples.append((
+                dialogue[0] if character is None else character,
+                dialogue[2],
+                s.frame_final_duration / fps
+            ))
+
+        learnt = calibrate_rates(samples)
+        if not learnt:
+            self.report({'ERROR'}, 'No dialogue strips selected.')
+            return {'CANCELLED'}
+
+        rates = json.loads(scene.unfurl_character_rates or '{}')
+        rates.update(learnt)
+        scene.unfurl_character_rates = json.dumps(rates, sort_keys=True)
+
+        self.report({'INFO'}, 'Calibrated {} characters'.format(len(learnt)))
+        return {'FINISHED'}
+
+
+# text name -> ScriptIndex of its last unfurl
+script_indexes = {}
+
+
+def unfurled_strips(scene, text, line):
+    '''Strips unfurled from a line of a text, or None if the text was not unfurled in this scene'''
+    lookup = script_indexes.get(text.name)
+    layout = load_layout(scene)
+    if not lookup or not layout or layout.get('source') != text.name:
+        return None
+
+    located = lookup.element_at(line)
+    if located is None:
+        return []
+
+    i, k = located
+    link = (lookup.scene_ids[i], -1 if k is None else k)
+    sequences = scene.sequence_editor.sequences_all
+
+    def linked():
+        strips = (sequences.get(name) for name in unfurled_strip_index(scene)[2].get(link, ()))
+        return [s for s in strips if s and (s.get('unfurl_scene'), s.get('unfurl_element')) == link]
+
+    strips = linked()
+    if len(strips) < len(unfurled_strip_index(scene)[2].get(link, ())):
+        # strips were renamed or removed since the index was built
+        frame_indexes.pop(scene.name, None)
+        strips = linked()
+    return strips
+
+
+def text_index(scene, text):
+    lookup = script_indexes.get(text.name)
+    if not lookup:
+        lookup = script_indexes[text.name] = script_index(
+            text.as_string(), timing_model(scene))
+    return lookup
+
+
+def unfurled_strip_index(scene):
+    '''Source text name, FrameIndex and {(unfurl_scene, unfurl_element): strip names}
+    of the strips unfurled in a scene, built in a single pass over the strips'''
+    cached = frame_indexes.get(scene.name)
+    if cached is None:
+        layout = load_layout(scene)
+        source = layout and layout.get('source')
+        strips = scene.sequence_editor.sequences_all if source and scene.sequence_editor else ()
+        strips = [s for s in strips if s.get('unfurl_source') == source and 'unfurl_line' in s]
+
+        links = {}
+        for s in strips:
+            links.setdefault((s['unfurl_scene'], s['unfurl_element']), []).append(s.name)
+
+        cached = frame_indexes[scene.name] = (source, FrameIndex(
+            (s.frame_final_start, s.frame_final_end, s['unfurl_line'], s['unfurl_element'] < 0)
+            for s in strips
+        ), links)
+    return cached
+
+
+def strip_frame_index(scene):
+    return unfurled_strip_index(scene)[:2]
+
+
+# text name -> (cursor line, playhead line) as last synced, so each side
+# only follows the other when it actually moved
+synced_lines = {}
+
+
+def show_text_line(text, line):
+    text.current_line_index = line
+    text.select_end_line_index = line
+
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            space = area.spaces.active
+            if area.type != 'TEXT_EDITOR' or space.text != text:
+                continue
+            if not space.top <= line < space.top + space.visible_lines:
+                space.top = max(0, line - space.visible_lines // 2)
+            area.tag_redraw()
+
+
+@persistent
+def sync_text_to_playhead(scene, *args):
+    if not scene.unfurl_sync:
+        return
+
+    source, index = strip_frame_index(scene)
+    text = source and bpy.data.texts.get(source)
+    line = text and index.line_at(scene.frame_current)
+    if line is None or line == synced_lines.get(source, (None, None))[1]:
+        return
+
+    synced_lines[source] = (line, line)
+    show_text_line(text, line)
+
+
+def sync_playhead_to_text():
+    scene = bpy.context.scene
+    if not scene or not scene.unfurl_sync:
+        return 0.2
+
+    source, index = strip_frame_index(scene)
+    text = source and bpy.data.texts.get(source)
+    if not text:
+        return 0.2
+
+    cursor = text.current_line_index
+    if cursor == synced_lines.get(source, (None, None))[0]:
+        return 0.2
+
+    lookup = text_index(scene, text)
+    located = lookup.element_at(cursor)
+    line = located and lookup.line_of(*located)
+    synced_lines[source] = (cursor, line)
+
+    frame = index.frame_of(line)
+    if frame is not None:
+        scene.frame_current = frame
+
+    return 0.2
+
+
+@persistent
+def forget_loaded_file(*args):
+    '''The caches are keyed by scene and text names, which another .blend reuses'''
+    for cache in (loaded_layouts, frame_indexes, script_indexes, synced_lines, calibrated_models):
+        cache.clear()
+
+
 class UNFURL_FOUNTAIN_OT_to_strips(Operator):
     '''Unfurl foutain to text strips'''
     bl_idname = "unfurl.fountain_to_strips"
@@ -414,23 +981,128 @@ class UNFURL_FOUNTAIN_OT_to_strips(Operator):
 
     def execute(self, context):
 
-        script = bpy.context.area.spaces.active.text.as_string()
+        text = bpy.context.area.spaces.active.text
+        script = text.as_string()
         if script.strip() == "":
             self.report({"ERROR"}, "No text in script.")
             return {"CANCELLED"}
 
-        scenes = to_vse_scenes(script)
+        lookup = script_index(script, timing_model(context.scene))
+        scenes = lookup.scenes
 
         if not scenes:
             self.report(
                 {"ERROR"}, "No scenes in fountain - Do you have valid headers?")
             return {"CANCELLED"}
 
-        lay_out_scenes(scenes)
+        report = lay_out_scenes(
+            scenes, context.scene.unfurl_incremental, text.name, lookup)
+        script_indexes[text.name] = lookup
+        self.report({'INFO'}, describe_layout(report))
 
         return {"FINISHED"}
 
 
+class UNFURL_FOUNTAIN_OT_to_strips_modal(Operator):
+    '''Unfurl foutain to text strips in the background, keeping the UI responsive'''
+    bl_idname = "unfurl.fountain_to_strips_modal"
+    bl_label = "Unfurl foutain to strips in the background"
+
+    strips_per_tick = 200
+
+    @classmethod
+    def poll(cls, context):
+        return UNFURL_FOUNTAIN_OT_to_strips.poll(context)
+
+    def invoke(self, context, event):
+        self.source = context.space_data.text.name
+        script = context.space_data.text.as_string()
+        if script.strip() == "":
+            self.report({"ERROR"}, "No text in script.")
+            return {"CANCELLED"}
+
+        scene = context.scene
+        self.fps = scene_fps(scene)
+        self.channel = scene.unfurl_channel or channel_index().top() + 1
+        self.model = timing_model(scene)
+        self.planned = None
+        self.error = None
+        self.specs = None
+        self.applied = 0
+
+        # parsing and planning never touch bpy, so they can leave the main thread
+        self.worker = Thread(target=self.plan, args=(script,), daemon=True)
+        self.worker.start()
+
+        wm = context.window_manager
+        self.timer = wm.event_timer_add(0.05, window=context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, 100)
+        return {'RUNNING_MODAL'}
+
+    def plan(self, script):
+        try:
+            lookup = script_index(script, self.model)
+            self.planned = (
+                lookup, plan_layout(lookup.scenes, self.channel, self.fps))
+        except Exception as e:
+            self.error = e
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            if self.specs is not None:
+                # the unfurl channels were already cleared, so the old layout is gone
+                forget_layout(context.scene)
+            self.finish(context)
+            self.report(
+                {'WARNING'}, 'Unfurl cancelled after {} strips'.format(self.applied))
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        if self.specs is None:
+            if self.worker.is_alive():
+                return {'PASS_THROUGH'}
+
+            if self.error or not self.planned[0].scenes:
+                self.finish(context)
+                self.report({'ERROR'}, str(self.error) if self.error else
+                            "No scenes in fountain - Do you have valid headers?")
+                return {'CANCELLED'}
+
+            # the unfurl channels are only cleared once there is something to replace them
+            channel = find_empty_channel()
+            self.specs = [
+                spec._replace(channel=spec.channel - self.channel + channel)
+                for spec in self.planned[1]
+            ]
+            self.channel = channel
+
+        chunk = self.specs[self.applied:self.applied + self.strips_per_tick]
+        create_strips(chunk, self.planned[0], self.source)
+        self.applied += len(chunk)
+        context.window_manager.progress_update(
+            int(100 * self.applied / len(self.specs)))
+
+        if self.applied < len(self.specs):
+            return {'RUNNING_MODAL'}
+
+        lookup = self.planned[0]
+        scenes = lookup.scenes
+        store_layout(context.scene, self.channel, scenes,
+                     scene_frame_spans(scenes, self.fps), self.fps, self.source)
+        script_indexes[self.source] = lookup
+        self.finish(context)
+        self.report({'INFO'}, 'Created {} strips'.format(self.applied))
+        return {'FINISHED'}
+
+    def finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+
+
 class UNFURL_FOUNTAIN_OT_specific_to_strips(Operator):
     '''Unfurl specific foutain to text strips'''
     bl_idname = "unfurl.fountain_specific_to_strips"
@@ -452,8 +1124,139 @@ class UNFURL_FOUNTAIN_OT_specific_to_strips(Operator):
         if script.strip() == "":
             return {"CANCELLED"}
 
-        scenes = to_vse_scenes(script)
-        lay_out_scenes(scenes)
+        lookup = script_index(script, timing_model(context.scene))
+        report = lay_out_scenes(
+            lookup.scenes, context.scene.unfurl_incremental, file.name, lookup)
+        script_indexes[file.name] = lookup
+        self.report({'INFO'}, describe_layout(report))
+
+        return {"FINISHED"}
+
+
+class UNFURL_FOUNTAIN_OT_jump_to_strip(Operator):
+    '''Select the strips unfurled from the line under the text cursor and move the playhead to them'''
+    bl_idname = "unfurl.jump_to_strip"
+    bl_label = "Jump to strip"
+
+    @classmethod
+    def poll(cls, context):
+        return UNFURL_FOUNTAIN_OT_to_strips.poll(context)
+
+    def execute(self, context):
+        scene = context.scene
+        text = context.space_data.text
+
+        strips = scene.sequence_editor and unfurled_strips(
+            scene, text, text.current_line_index)
+
+        if strips is None:
+            self.report({"ERROR"}, "Unfurl {} to strips first".format(text.name))
+            return {"CANCELLED"}
+
+        if not strips:
+            self.report({"WARNING"}, "No strip for this line")
+            return {"CANCELLED"}
+
+        for s in context.selected_sequences or ():
+            s.select = False
+        for s in strips:
+            s.select = True
+
+        scene.sequence_editor.active_strip = strips[0]
+        scene.frame_current = strips[0].frame_final_start
+
+        return {"FINISHED"}
+
+
+class UNFURL_FOUNTAIN_OT_file_to_strips(Operator):
+    '''Unfurl a foutain file on disk to text strips, without loading it as a text'''
+    bl_idname = "unfurl.fountain_file_to_strips"
+    bl_label = "Unfurl foutain file to strips"
+
+    filepath: StringProperty(name='File', subtype='FILE_PATH')
+    filter_glob: StringProperty(default='*.fountain', options={'HIDDEN'})
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        path = abspath(self.filepath)
+        if not os.path.isfile(path):
+            self.report({"ERROR"}, "No file {}".format(self.filepath))
+            return {"CANCELLED"}
+
+        scenes = file_vse_scenes(path, timing_model(context.scene))
+
+        if not scenes:
+            self.report(
+                {"ERROR"}, "No scenes in fountain - Do you have valid headers?")
+            return {"CANCELLED"}
+
+        report = lay_out_scenes(scenes, context.scene.unfurl_incremental)
+        self.report({'INFO'}, describe_layout(report))
+
+        return {"FINISHED"}
+
+
+def lay_out_episodes(episodes, gap):
+    started = perf_counter()
+
+    scene = bpy.context.scene
+    fps = scene_fps(scene)
+    channel = find_empty_channel()
+
+    planning = perf_counter()
+    specs = plan_episodes(episodes, channel, fps, gap)
+    planned = perf_counter() - planning
+
+    create_strips(specs)
+    # the gaps between episodes are not part of a single script layout
+    forget_layout(scene)
+
+    return LayoutReport(len(specs), planned, perf_counter() - started - planned)
+
+
+class UNFURL_FOUNTAIN_OT_episodes_to_strips(Operator):
+    '''Unfurl several foutain scripts one after another, parsing them in parallel'''
+    bl_idname = "unfurl.episodes_to_strips"
+    bl_label = "Unfurl episodes to strips"
+
+    sources: StringProperty(
+        name='Episodes', description='Text names or file paths, separated by ;')
+    gap_seconds: FloatProperty(name='Gap seconds', default=5, min=0)
+    processes: IntProperty(
+        name='Processes', description='Parsing processes, 0 for one per CPU', default=0, min=0)
+
+    def invoke(self, context, event):
+        wm = context.window_manager
+        return wm.invoke_props_dialog(self)
+
+    def execute(self, context):
+        sources = [s.strip() for s in self.sources.split(';') if s.strip()]
+        if not sources:
+            return {"CANCELLED"}
+
+        jobs = []
+        for source in sources:
+            text = bpy.data.texts.get(source)
+            if text:
+                jobs.append({'script': text.as_string()})
+            elif os.path.isfile(abspath(source)):
+                jobs.append({'path': abspath(source)})
+            else:
+                self.report({"ERROR"}, "No text or file {}".format(source))
+                return {"CANCELLED"}
+
+        parsed = parse_episodes(
+            jobs, timing_model(context.scene), self.processes or None)
+
+        for source, (scenes, seconds) in zip(sources, parsed):
+            self.report({'INFO'}, '{}: {} scenes, parsed in {:.2f}s'.format(
+                source, len(scenes), seconds))
+
+        report = lay_out_episodes([p[0] for p in parsed], self.gap_seconds)
+        self.report({'INFO'}, describe_layout(report))
 
         return {"FINISHED"}
 
@@ -463,37 +1266,180 @@ class UNFURL_FOUNTAIN_OT_delete_scenes_from_strips(Operator):
     bl_idname = 'unfurl.delete_scenes_from_strips'
     bl_label = 'Delete scenes from selected strips'
 
+    dry_run: BoolProperty(
+        name='Dry run', description='Only report what would be deleted', default=False)
+
     def execute(self, context):
 
-        window = context.window
-        current_scene = window.scene
+        # scenes shown in a window cannot be removed, and without windows,
+        # as when run in the background, the context scene is kept too
+        shown = {context.scene.name} | {w.scene.name for w in context.window_manager.windows}
+        targets = {}
+        skipped = set()
 
-        seqs = [s for s in context.selected_sequences if s.type == 'SCENE']
+        for seq in context.selected_sequences or ():
+            if seq.type != 'SCENE' or not seq.scene:
+                continue
+            if seq.scene.name in shown:
+                skipped.add(seq.scene.name)
+            else:
+                targets[seq.scene.name] = seq.scene
 
-        for seq in seqs:
+        if skipped:
+            self.report({'WARNING'}, 'Not deleting scenes in use: {}'.format(
+                ', '.join(sorted(skipped))))
 
-            # scene was deleted from another sequence
-            if not seq.scene:
-                continue
+        # objects are not removed with their scenes, but they are freed on
+        # save once no other scene links them
+        kept = {o for s in bpy.data.scenes if s.name not in targets for o in s.objects}
+        orphaned = {o for s in targets.values() for o in s.objects} - kept
+        strips = sum(len(s.sequence_editor.sequences_all)
+                     for s in targets.values() if s.sequence_editor)
+
+        summary = '{} scenes, orphaning {} objects and {} strips: {}'.format(
+            len(targets), len(orphaned), strips, ', '.join(sorted(targets)))
 
-            window.scene = seq.scene
-            bpy.ops.scene.delete()
+        if self.dry_run:
+            self.report({'INFO'}, 'Would delete ' + summary)
+            return {'FINISHED'}
 
-        window.scene = current_scene
+        # one call, so the ID relations are only rebuilt once
+        bpy.data.batch_remove(list(targets.values()))
 
+        self.report({'INFO'}, 'Deleted ' + summary)
         return {'FINISHED'}
 
 
+def beat_texts(source, scenes, ids):
+    '''Text datablocks for every beat, reusing and rewriting the ones from previous runs
+
+    Texts are matched by the source file and beat id kept in their custom
+    properties; texts of beats that are gone from the script are removed.
+    '''
+    texts = bpy.data.texts
+    previous = {
+        t['unfurl_beat']: t for t in texts
+        if t.get('unfurl_source') == source and 'unfurl_beat' in t
+    }
+
+    result = []
+    for scene, (_, beat_ids) in zip(scenes, ids):
+        scene_texts = []
+        for beat, beat_id in zip(scene.beats, beat_ids):
+            content = '\n'.join(beat.lines)
+            text = previous.pop(beat_id, None)
+
+            if text is None:
+                text = texts.new(beat.name)
+                text['unfurl_source'] = source
+                text['unfurl_beat'] = beat_id
+                text.write(content)
+            elif text.as_string() != content:
+                text.clear()
+                text.write(content)
+
+            scene_texts.append(text)
+        result.append(scene_texts)
+
+    for text in previous.values():
+        texts.remove(text)
+
+    return result
+
+
+def build_board(tree, scenes, origin, source, sync=False):
+    '''Create the scene and beat frames straight through `tree.nodes`, no operator calls
+
+    With `sync`, frames from a previous run of the same source are matched by
+    the id in their custom properties: they keep their place and only get
+    their label and text updated, new frames are added and stale ones removed.
+    '''
+    started = perf_counter()
+    cards = plan_board(scenes, origin)
+    ids = board_ids(scenes)
+    planned = perf_counter() - started
+
+    texts = beat_texts(source, scenes, ids)
+
+    nodes = tree.nodes
+    existing = {}
+    if sync:
+        existing = {
+            n['unfurl_id']: n for n in nodes
+            if n.type == 'FRAME' and n.get('unfurl_source') == source and 'unfurl_id' in n
+        }
+
+    created = 0
+    scene_nodes = []
+
+    for scene, (scene_id, _) in zip(scenes, ids):
+        scene_node = existing.pop(scene_id, None)
+
+        if scene_node is None:
+            scene_node = nodes.new('NodeFrame')
+            scene_node['unfurl_source'] = source
+            scene_node['unfurl_id'] = scene_id
+            scene_node.location = origin
+            scene_node.use_custom_color = True
+            scene_node.color = (0.0, 0.0, 0.3)
+            created += 1
+
+        if scene_node.label != scene.name:
+            scene_node.label = scene.name
+        scene_nodes.append(scene_node)
+
+    for card in cards:
+        beat = scenes[card.scene].beats[card.beat]
+        beat_id = ids[card.scene][1][card.beat]
+        beat_node = existing.pop(beat_id, None)
+
+        if beat_node is None:
+            beat_node = nodes.new('NodeFrame')
+            beat_node['unfurl_source'] = source
+            beat_node['unfurl_id'] = beat_id
+            beat_node.use_custom_color = True
+            beat_node.color = (0.0, 0.3, 0.0)
+            beat_node.shrink = False
+            beat_node.width = card_width
+            beat_node.height = card_height
+            beat_node.location = (card.x, card.y)
+            beat_node.parent = scene_nodes[card.scene]
+            created += 1
+        elif beat_node.parent != scene_nodes[card.scene]:
+            # the scene frame was deleted and made again, which unparented
+            # the beat; attaching keeps it where it was placed
+            beat_node.parent = scene_nodes[card.scene]
+
+        if beat_node.label != beat.name:
+            beat_node.label = beat.name
+
+        text = texts[card.scene][card.beat]
+        if beat_node.text != text:
+            beat_node.text = text
+
+    for node in existing.values():
+        nodes.remove(node)
+
+    return BoardReport(created, planned, perf_counter() - started - planned)
+
+
+def describe_board(report):
+    return 'Created {} frames (planning {:.2f}s, nodes {:.2f}s)'.format(*report)
+
+
 class NODE_OP_frames_from_fountain(Operator):
     bl_idname = 'unfurl.frames_from_fountain'
     bl_label = 'Create frames from fountain'
 
     from_file: StringProperty(name='File')
     clear_tree: BoolProperty(name='Clear tree', default=False)
+    sync: BoolProperty(
+        name='Sync', description='Update the frames of a previous run in place, keeping their positions', default=False)
 
     def draw(self, context):
         layout = self.layout
         layout.prop(self, "clear_tree")
+        layout.prop(self, "sync")
         layout.prop_search(self, "from_file", bpy.data, 'texts')
 
     def invoke(self, context, event):
@@ -515,39 +1461,9 @@ class NODE_OP_frames_from_fountain(Operator):
             tree.nodes.clear()
 
         scenes = to_frames_scenes(text.as_string())
-        side = ceil(sqrt(len(scenes)))
-
-        rows = [0 for _ in range(side)]
-
-        for i, scene in enumerate(scenes):
-            bpy.ops.node.add_node(type='NodeFrame')
-            scene_node = context.active_node
-            scene_node.label = scene.name
-            scene_node.use_custom_color = True
-            scene_node.color = (0.0, 0.0, 0.3)
-
-            column = i // side
-
-            for j, beat in enumerate(scene.beats):
-                bpy.ops.node.add_node(type='NodeFrame')
-                beat_node = context.active_node
-                beat_node.use_custom_color = True
-                beat_node.color = (0.0, 0.3, 0.0)
-                beat_node.shrink = False
-                beat_node.width = card_width
-                beat_node.height = card_height
-                beat_node.location.x += (i // side) * \
-                    (card_width + card_margin * 4)
-                beat_node.location.y -= rows[column] * \
-                    (card_height + card_margin) + (i % side * card_margin)
-                beat_node.label = beat.name
-                beat_node.parent = scene_node
-
-                rows[column] += 1
-
-                text = bpy.data.texts.new(beat.name)
-                text.write('\n'.join(beat.lines))
-                beat_node.text = text
+        report = build_board(
+            tree, scenes, tuple(context.space_data.cursor_location), self.from_file, self.sync)
+        self.report({'INFO'}, describe_board(report))
 
         return {'FINISHED'}
 
@@ -563,21 +1479,65 @@ class UNFURL_FOUNTAIN_PT_panel(bpy.types.Panel):
         layout = self.layout
         row = layout.row(align=True)
         row.operator("unfurl.fountain_to_strips")
+        row = layout.row(align=True)
+        row.operator("unfurl.fountain_to_strips_modal")
+        row = layout.row(align=True)
+        row.operator("unfurl.fountain_file_to_strips")
+        row = layout.row(align=True)
+        row.operator("unfurl.jump_to_strip")
+        row.prop(context.scene, 'unfurl_sync')
+
+        text = context.space_data.text
+        lookup = text and script_indexes.get(text.name)
+        i = lookup and lookup.scene_at(text.current_line_index)
+        if i is not None:
+            row = layout.row(align=True)
+            row.label(text='Scene {}, {:.1f}s'.format(i + 1, lookup.scene_seconds(i)))
+
         row = layout.row(align=True)
         row.operator("unfurl.strips_to_markers")
         row = layout.row(align=True)
         row.operator("unfurl.clear_markers")
         row = layout.row(align=True)
         row.prop(context.scene, 'unfurl_channel')
+        row = layout.row(align=True)
+        row.prop(context.scene, 'unfurl_incremental')
+        row = layout.row(align=True)
+        row.prop(context.scene, 'unfurl_timing_model')
+        row = layout.row(align=True)
+        row.operator("unfurl.calibrate_reading_speed")
 
 
 classes = (UNFURL_FOUNTAIN_OT_delete_scenes_from_strips, UNFURL_FOUNTAIN_PT_panel, UNFURL_FOUNTAIN_OT_to_strips, UNFURL_FOUNTAIN_OT_specific_to_strips, UNFURL_FOUNTAIN_OT_strips_to_markers, UNFURL_FOUNTAIN_OT_clear_markers,
-           UNFURL_FOUNTAIN_OT_match_strip_titles, UNFURL_FOUNTAIN_OT_concatenate_text_strips, UNFURL_FOUNTAIN_OT_echo_title_to_strip, UNFURL_FOUNTAIN_OT_echo_ddate_to_strip, UNFURL_REPLACE_TEXT_OT_replace_text_for_strip, NODE_OP_frames_from_fountain)
+           UNFURL_FOUNTAIN_OT_match_strip_titles, UNFURL_FOUNTAIN_OT_concatenate_text_strips, UNFURL_FOUNTAIN_OT_echo_title_to_strip, UNFURL_FOUNTAIN_OT_echo_ddate_to_strip, UNFURL_REPLACE_TEXT_OT_replace_text_for_strip, NODE_OP_frames_from_fountain, UNFURL_FOUNTAIN_OT_calibrate_reading_speed,
+           UNFURL_FOUNTAIN_OT_to_strips_modal, UNFURL_FOUNTAIN_OT_episodes_to_strips,
+           UNFURL_FOUNTAIN_OT_file_to_strips, UNFURL_FOUNTAIN_OT_jump_to_strip,
+           UNFURL_FOUNTAIN_OT_cancel_export, UNFURL_FOUNTAIN_PT_export, UNFURL_FOUNTAIN_OT_strips_to_fountain)
 
 
 def register():
 
     bpy.types.Scene.unfurl_channel = bpy.props.IntProperty(default=0, min=0)
+    bpy.types.Scene.unfurl_incremental = bpy.props.BoolProperty(
+        name='Incremental', description='Only rebuild the strips of scenes that changed since the last unfurl', default=False)
+    bpy.types.Scene.unfurl_layout = bpy.props.StringProperty()
+    bpy.types.Scene.unfurl_timing_model = bpy.props.EnumProperty(
+        name='Timing',
+        items=[
+            ('WORDS', 'Words', 'Same words per second for every character'),
+            ('SYLLABLES', 'Syllables', 'Time dialogue by syllable count'),
+            ('CALIBRATED', 'Calibrated', 'Per character speeds learnt from edited strips'),
+        ],
+        default='WORDS')
+    bpy.types.Scene.unfurl_character_rates = bpy.props.StringProperty()
+    bpy.types.Scene.unfurl_make_ttl = bpy.props.FloatProperty(
+        name='Make cache seconds', description='How long the output of the makefile helpers is reused, unless the makefile changes', default=3600, min=0)
+    bpy.types.Scene.unfurl_sync = bpy.props.BoolProperty(
+        name='Sync', description='Follow the playhead in the text, and the text cursor with the playhead', default=False)
+
+    bpy.app.handlers.frame_change_post.append(sync_text_to_playhead)
+    bpy.app.handlers.load_post.append(forget_loaded_file)
+    bpy.app.timers.register(sync_playhead_to_text, persistent=True)
 
     from bpy.utils import register_class
     for cls in classes:
@@ -589,6 +1549,17 @@ def unregister():
     for cls in classes:
         unregister_class(cls)
 
+    if sync_text_to_playhead in bpy.app.handlers.frame_change_post:
+        bpy.app.handlers.frame_change_post.remove(sync_text_to_playhead)
+    if forget_loaded_file in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(forget_loaded_file)
+    if bpy.app.timers.is_registered(sync_playhead_to_text):
+        bpy.app.timers.unregister(sync_playhead_to_text)
+    if bpy.app.timers.is_registered(watch_export):
+        bpy.app.timers.unregister(watch_export)
+    for job in export_jobs.values():
+        job.cancel()
+
 
 if __name__ == '__main__':
     register()
@@ -0,0 +1,182 @@
+"""Headless parsing and layout benchmarks, run with plain CPython: `python benchmark.py [scenes ...]`"""
+
+from time import perf_counter
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_baseline import BaselineFountain
+from fountain import ElementTable, Fountain, iter_parse
+from planner import frames_scenes_from, plan_board, plan_layout, vse_scenes_from
+
+fixtures = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+fps = 24
+fps_base = 1
+channel = 1
+
+
+def synthetic_script(scenes):
+    blocks = ['Title: Benchmark\nAuthor: unfurl\n']
+    for i in range(scenes):
+        blocks.append('\n'.join([
+            'INT. ROOM {} - DAY'.format(i),
+            '',
+            'Somebody walks into room {} and looks around.'.format(i),
+            '',
+            'ALICE',
+            '(whispering)',
+            'Did you hear that?',
+            'It came from the other side of the wall.',
+            '',
+            'BOB',
+            'Probably just the pipes again.',
+            '',
+            'They both listen for a long while.',
+            ''
+        ]))
+    return '\n'.join(blocks)
+
+
+def long_dialogue_script(lines):
+    """A single scene with one dialogue `lines` lines long"""
+    return '\n'.join(
+        ['INT. ROOM - DAY', '', 'ALICE'] +
+        ['And then, line {}, she kept on talking.'.format(i) for i in range(lines)]
+    ) + '\n'
+
+
+class DictElement:
+    """A parsed element as it was before slots: a plain object with a __dict__"""
+
+    def __init__(self, element):
+        self.element_type = element.element_type
+        self.element_text = element.element_text
+        self.section_depth = element.section_depth
+        self.scene_number = element.scene_number
+        self.scene_abbreviation = element.scene_abbreviation
+        self.is_centered = element.is_centered
+        self.is_dual_dialogue = element.is_dual_dialogue
+        self.original_line = element.original_line
+        self.original_content = element.original_content
+
+
+class DictFountain(Fountain):
+    """Fountain keeping dict based elements, a new one for every empty line"""
+
+    def iter_elements(self, stream):
+        for element in super().iter_elements(stream):
+            yield DictElement(element)
+
+
+def measure(function, *args):
+    started = perf_counter()
+    result = function(*args)
+    elapsed = perf_counter() - started
+
+    # a second, traced run, so tracing does not skew the timing
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return result, elapsed, peak
+
+
+def run(sizes):
+    print('{:>8} {:>8} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+        'scenes', 'strips', 'lines/s', 'parse s', 'plan s', 'board s', 'parse KiB', 'plan KiB'))
+
+    for size in sizes:
+        script = synthetic_script(size)
+        _, tokenize_time, _ = measure(lambda: list(iter_parse(script)))
+        lines_per_second = (script.count('\n') + 1) / tokenize_time
+        scenes, parse_time, parse_peak = measure(
+            lambda: vse_scenes_from(iter_parse(script)))
+        specs, plan_time, plan_peak = measure(
+            plan_layout, scenes, channel, fps, fps_base)
+        board = frames_scenes_from(iter_parse(script))
+        _, board_time, _ = measure(plan_board, board)
+
+        print('{:>8} {:>8} {:>10.0f} {:>10.4f} {:>10.4f} {:>10.4f} {:>10} {:>10}'.format(
+            size, len(specs), lines_per_second, parse_time, plan_time, board_time,
+            parse_peak // 1024, plan_peak // 1024))
+
+
+def lines_per_second(parser, script, runs=15):
+    """Best of `runs` rates at which `parser` parses `script`"""
+    best = None
+    for _ in range(runs):
+        started = perf_counter()
+        for _ in parser('').iter_elements(script):
+            pass
+        elapsed = perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return (script.count('\n') + 1) / best
+
+
+def run_corpus(repeats=100):
+    """Lines per second of the parser before and after dispatching on the first character,
+    on the fixture scripts, each repeated `repeats` times, and on a synthetic script"""
+    print('{:<18} {:>8} {:>12} {:>12} {:>8}'.format(
+        'script', 'lines', 'before/s', 'after/s', 'speedup'))
+
+    scripts = []
+    for name in sorted(os.listdir(fixtures)):
+        if name.endswith('.fountain'):
+            with open(os.path.join(fixtures, name), encoding='utf-8') as f:
+                script = f.read()
+            # the title page only once, so the rest is all body
+            head, body = script.split('\n\n', 1)
+            scripts.append((name, head + '\n\n' + '\n'.join([body] * repeats)))
+    scripts.append(('synthetic 1000', synthetic_script(1000)))
+
+    for name, script in scripts:
+        before = lines_per_second(BaselineFountain, script)
+        after = lines_per_second(Fountain, script)
+        print('{:<18} {:>8} {:>12.0f} {:>12.0f} {:>7.2f}x'.format(
+            name, script.count('\n') + 1, before, after, after / before))
+
+
+def run_long_dialogue(sizes=(10000, 50000, 200000), tolerance=3):
+    """Parse ever longer single dialogues, failing when the time per line grows with the length"""
+    print('{:>8} {:>10} {:>12}'.format('lines', 'parse s', 'us/line'))
+
+    per_line = []
+    for size in sizes:
+        script = long_dialogue_script(size)
+        scenes, parse_time, _ = measure(lambda: vse_scenes_from(iter_parse(script)))
+        assert len(scenes[0].elements) == 1
+        per_line.append(parse_time / size)
+        print('{:>8} {:>10.4f} {:>12.3f}'.format(size, parse_time, per_line[-1] * 1e6))
+
+    if max(per_line) > tolerance * min(per_line):
+        sys.exit('Parsing a dialogue is not linear in its length')
+
+
+def run_memory(sizes=(1000, 10000)):
+    """Peak memory of holding every element of a script: dict based, slotted, and as a table"""
+    print('{:>8} {:>10} {:>10} {:>12} {:>10} {:>8}'.format(
+        'scenes', 'elements', 'dict KiB', 'slotted KiB', 'table KiB', 'saved'))
+
+    for size in sizes:
+        script = synthetic_script(size)
+        elements, _, dict_peak = measure(lambda: DictFountain(script).elements)
+        _, _, slotted_peak = measure(lambda: Fountain(script).elements)
+        _, _, table_peak = measure(lambda: ElementTable(iter_parse(script)))
+
+        print('{:>8} {:>10} {:>10} {:>12} {:>10} {:>7.0%}'.format(
+            size, len(elements), dict_peak // 1024, slotted_peak // 1024, table_peak // 1024,
+            1 - slotted_peak / dict_peak))
+
+
+if __name__ == '__main__':
+    run([int(a) for a in sys.argv[1:]] or [10, 100, 1000])
+    print()
+    run_long_dialogue()
+    print()
+    run_memory()
+    print()
+    run_corpus()
@@ -0,0 +1,321 @@
+"""The fountain body parser as it was before its line classification
+dispatched on the first character (c687fba), so that benchmark.py can report
+the lines per second of both on the same machine"""
+
+from fountain import COMMON_TRANSITIONS, EMPTY_LINE, Fountain, FountainElement, _with_next
+
+
+class BaselineFountain(Fountain):
+    def _iter_body(self, script_body):
+        """Yield body elements as they are finalised.
+
+        Only the last element is held back, as the following lines may still
+        be appended to it. Those continuation lines are buffered and joined
+        once the element is closed. A dual dialogue `^` cue flags its partner
+        Character even if that one was already yielded.
+        """
+        is_comment_block = False
+        is_inside_dialogue_block = False
+        newlines_before = 0
+        comment_text = list()
+        elements = list()
+        last_character = None
+        open_element = None
+        open_lines = list()
+
+        for linenum, (line, next_line) in enumerate(_with_next(script_body)):
+            assert type(line) is str
+            if len(elements) > 1:
+                if open_element is not None:
+                    open_element.element_text = '\n'.join(open_lines)
+                    open_element = None
+                yield from elements[:-1]
+                del elements[:-1]
+
+            line = line.lstrip()
+            full_strip = line.strip()
+
+            if (not line or line.isspace()) and not is_comment_block:
+                elements.append(EMPTY_LINE)
+                is_inside_dialogue_block = False
+                newlines_before += 1
+                continue
+
+            if line.startswith('/*'):
+                line = line.rstrip()
+                if line.endswith('*/'):
+                    text = line.replace('/*', '').replace('*/', '')
+                    elements.append(
+                        FountainElement(
+                            'Boneyard',
+                            text,
+                            original_line=linenum,
+                            original_content=line
+                        )
+                    )
+                    is_comment_block = False
+                    newlines_before = 0
+                else:
+                    is_comment_block = True
+                    comment_text.append('')
+                continue
+
+            if line.rstrip().endswith('*/'):
+                text = line.replace('*/', '')
+                comment_text.append(text.strip())
+                elements.append(
+                    FountainElement(
+                        'Boneyard',
+                        '\n'.join(comment_text),
+                        original_line=linenum,
+                        original_content=line
+                    )
+                )
+                is_comment_block = False
+                comment_text = list()
+                newlines_before = 0
+                continue
+
+            if is_comment_block:
+                comment_text.append(line)
+                continue
+
+            if line.startswith('==='):
+                elements.append(
+                    FountainElement(
+                        'Page Break',
+                        line,
+                        original_line=linenum,
+                        original_content=line
+                    )
+                )
+                newlines_before = 0
+                continue
+
+            if len(full_strip) > 0 and full_strip[0] == '=':
+                elements.append(
+                    FountainElement(
+                        'Synopsis',
+                        full_strip[1:].strip(),
+                        original_line=linenum,
+                        original_content=line
+                    )
+                )
+                continue
+
+            if (
+                newlines_before > 0 and
+                full_strip.startswith('[[') and
+                full_strip.endswith(']]')
+            ):
+                elements.append(
+                    FountainElement(
+                        'Comment',
+                        full_strip.strip('[] \t'),
+                        original_line=linenum,
+                        original_content=line
+                    )
+                )
+                continue
+
+            if len(full_strip) > 0 and full_strip[0] == '#':
+                newlines_before = 0
+                depth = full_strip.split()[0].count('#')
+                elements.append(
+                    FountainElement(
+                        'Section Heading',
+                        full_strip[depth:],
+                        section_depth=depth,
+                        original_line=linenum,
+                        original_content=line
+                    )
+                )
+                continue
+
+            if len(line) > 1 and line[0] == '.' and line[1] != '.':
+                newlines_before = 0
+                if full_strip[-1] == '#' and full_strip.count('#') > 1:
+                    scene_number_start = len(full_strip) - \
+                        full_strip[::-1].find('#', 1) - 1
+                    elements.append(
+                        FountainElement(
+                            'Scene Heading',
+                            full_strip[1:scene_number_start].strip(),
+                            scene_number=full_strip[
+                                scene_number_start:
+                            ].strip('#').strip(),
+                            original_line=linenum,
+                            original_content=line
+                        )
+                    )
+                else:
+                    elements.append(
+                        FountainElement(
+                            'Scene Heading',
+                            full_strip[1:].strip(),
+                            original_line=linenum,
+                            original_content=line
+                        )
+                    )
+                continue
+
+            if (
+                line[0:4].upper() in
+                ['INT ', 'INT.', 'EXT ', 'EXT.', 'EST ', 'EST.', 'I/E ', 'I/E.'] or
+                line[0:8].upper() in ['INT/EXT ', 'INT/EXT.'] or
+                line[0:9].upper() in ['INT./EXT ', 'INT./EXT.']
+            ):
+                newlines_before = 0
+                scene_name_start = line.find(line.split()[1])
+                if full_strip[-1] == '#' and full_strip.count('#') > 1:
+                    scene_number_start = len(full_strip) - \
+                        full_strip[::-1].find('#', 1) - 1
+                    elements.append(
+                        FountainElement(
+                            'Scene Heading',
+                            full_strip[
+                                scene_name_start:scene_number_start
+                            ].strip(),
+                            scene_number=full_strip[
+                                scene_number_start:
+                            ].strip('#').strip(),
+                            original_line=linenum,
+                            scene_abbreviation=line.split()[0],
+                            original_content=line
+                        )
+                    )
+                else:
+                    elements.append(
+                        FountainElement(
+                            'Scene Heading',
+                            full_strip[scene_name_start:].strip(),
+                            original_line=linenum,
+                            scene_abbreviation=line.split()[0],
+                            original_content=line
+                        )
+                    )
+                continue
+
+            if full_strip.endswith(' TO:'):
+                newlines_before = 0
+                elements.append(
+                    FountainElement(
+                        'Transition',
+                        full_strip,
+                        original_line=linenum,
+                        original_content=line
+                    )
+                )
+                continue
+
+            if full_strip in COMMON_TRANSITIONS:
+                newlines_before = 0
+                elements.append(
+                    FountainElement(
+                        'Transition',
+                        full_strip,
+                        original_line=linenum,
+                        original_content=line
+                    )
+                )
+                continue
+
+            if full_strip[0] == '>':
+                newlines_before = 0
+                if len(full_strip) > 1 and full_strip[-1]:
+                    elements.append(
+                        FountainElement(
+                            'Action',
+                            full_strip[1:-1].strip(),
+                            is_centered=True,
+                            original_line=linenum,
+                            original_content=line
+                        )
+                    )
+                else:
+                    elements.append(
+                        FountainElement(
+                            'Transition',
+                            full_strip[1:].strip(),
+                            original_line=linenum,
+                            original_content=line
+                        )
+                    )
+                continue
+
+            if (
+                newlines_before > 0 and
+                next_line and
+                not line[0] in ['[', ']', ',', '(', ')']
+            ):
+                newlines_before = 0
+                if full_strip[-1] == '^':
+                    if last_character:
+                        last_character.is_dual_dialogue = True
+                    last_character = FountainElement(
+                        'Character',
+                        full_strip.rstrip('^').strip(),
+                        is_dual_dialogue=True,
+                        original_line=linenum,
+                        original_content=line
+                    )
+                    elements.append(last_character)
+                    is_inside_dialogue_block = True
+                else:
+                    last_character = FountainElement(
+                        'Character',
+                        full_strip,
+                        original_line=linenum,
+                        original_content=line
+                    )
+                    elements.append(last_character)
+                    is_inside_dialogue_block = True
+                continue
+
+            if is_inside_dialogue_block:
+                if newlines_before == 0 and full_strip[0] == '(':
+                    elements.append(
+                        FountainElement(
+                            'Parenthetical',
+                            full_strip,
+                            original_line=linenum,
+                            original_content=line
+                        )
+                    )
+                else:
+                    if elements[-1].element_type == 'Dialogue':
+                        if elements[-1] is not open_element:
+                            open_element = elements[-1]
+                            open_lines = [open_element.element_text]
+                        open_lines.append(full_strip)
+                    else:
+                        elements.append(
+                            FountainElement(
+                                'Dialogue',
+                                full_strip,
+                                original_line=linenum,
+                                original_content=line
+                            )
+                        )
+                continue
+
+            if newlines_before == 0 and len(elements) > 0:
+                if elements[-1] is not open_element:
+                    open_element = elements[-1]
+                    open_lines = [open_element.element_text]
+                open_lines.append(full_strip)
+                newlines_before = 0
+            else:
+                elements.append(
+                    FountainElement(
+                        'Action',
+                        full_strip,
+                        original_line=linenum,
+                        original_content=line
+                    )
+                )
+                newlines_before = 0
+
+        if open_element is not None:
+            open_element.element_text = '\n'.join(open_lines)
+        yield from elements
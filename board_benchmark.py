@@ -0,0 +1,48 @@
+"""Beat board benchmark against a real node tree, run inside Blender:
+`blender --background --python board_benchmark.py -- [scenes beats]`"""
+
+import importlib
+import os
+import sys
+
+import bpy
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(here))
+sys.path.insert(0, here)
+
+# the repository is the addon package, under whatever name it was checked out as
+unfurl = importlib.import_module(os.path.basename(here))
+
+from planner import to_frames_scenes
+
+
+def board_script(scenes, beats):
+    """`scenes` scenes sharing `beats` synopsis beats between them"""
+    blocks = []
+    for i in range(scenes):
+        blocks.append('INT. ROOM {} - DAY\n'.format(i))
+        for k in range(beats // scenes + (i < beats % scenes)):
+            blocks.append('= Beat {} of scene {}\nSomething happens, part {}.\n'.format(k, i, k))
+    return '\n'.join(blocks)
+
+
+def run(scenes=60, beats=400):
+    source = 'board_benchmark.fountain'
+    parsed = to_frames_scenes(board_script(scenes, beats))
+    assert sum(len(s.beats) for s in parsed) == beats
+
+    tree = bpy.data.node_groups.new('Unfurl board benchmark', 'ShaderNodeTree')
+    try:
+        for label, sync in (('create', False), ('sync unchanged', True)):
+            report = unfurl.build_board(tree, parsed, (0, 0), source, sync)
+            print('{:<16} {}'.format(label, report))
+        print('{} scenes, {} beats, {} nodes'.format(scenes, beats, len(tree.nodes)))
+    finally:
+        bpy.data.node_groups.remove(tree)
+        for text in [t for t in bpy.data.texts if t.get('unfurl_source') == source]:
+            bpy.data.texts.remove(text)
+
+
+if __name__ == '__main__':
+    run(*[int(a) for a in sys.argv[sys.argv.index('--') + 1:]] if '--' in sys.argv else [])
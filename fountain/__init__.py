@@ -7,11 +7,53 @@ Original code for Objective-C at https://github.com/nyousefi/Fountain
 Further Edited by Manuel Senfft
 """
 
+from array import array
+from itertools import chain
+import mmap
+import os
 
-COMMON_TRANSITIONS = {'FADE OUT.', 'CUT TO BLACK.', 'FADE TO BLACK.'}
+COMMON_TRANSITIONS = frozenset({'FADE OUT.', 'CUT TO BLACK.', 'FADE TO BLACK.'})
+SCENE_HEADING_PREFIXES = frozenset({
+    'INT ', 'INT.', 'EXT ', 'EXT.', 'EST ', 'EST.', 'I/E ', 'I/E.'
+})
+LONG_SCENE_HEADING_PREFIXES = frozenset({'INT/EXT ', 'INT/EXT.'})
+LONGEST_SCENE_HEADING_PREFIXES = frozenset({'INT./EXT ', 'INT./EXT.'})
+# first characters that can start a scene heading prefix, plus anything
+# non ASCII whose upper case might
+SCENE_HEADING_STARTS = frozenset('IiEe')
+CHARACTER_EXCLUDED_STARTS = frozenset('[],()')
+
+ELEMENT_TYPES = (
+    'Empty Line',
+    'Boneyard',
+    'Page Break',
+    'Synopsis',
+    'Comment',
+    'Section Heading',
+    'Scene Heading',
+    'Transition',
+    'Action',
+    'Character',
+    'Parenthetical',
+    'Dialogue',
+)
+TYPE_CODES = {t: i for i, t in enumerate(ELEMENT_TYPES)}
 
 
 class FountainElement:
+    __slots__ = (
+        'element_type',
+        'element_text',
+        'section_depth',
+        'scene_number',
+        'scene_abbreviation',
+        'is_centered',
+        'is_dual_dialogue',
+        'original_line',
+        'original_content',
+        'dual_partner',
+    )
+
     def __init__(
         self,
         element_type,
@@ -22,7 +64,8 @@ class FountainElement:
         is_dual_dialogue=False,
         original_line=0,
         scene_abbreviation='.',
-        original_content=''
+        original_content='',
+        dual_partner=None
     ):
         self.element_type = element_type
         self.element_text = element_text
@@ -33,16 +76,147 @@ class FountainElement:
         self.is_dual_dialogue = is_dual_dialogue
         self.original_line = original_line
         self.original_content = original_content
+        # on the `^` Character of a dual dialogue, the Character it speaks alongside
+        self.dual_partner = dual_partner
+
+    @property
+    def type_code(self):
+        return TYPE_CODES[self.element_type]
 
     def __repr__(self):
         return self.element_type + ': ' + self.element_text
 
 
+# empty lines carry no content, so all of them share one element
+EMPTY_LINE = FountainElement('Empty Line')
+
+
+class ElementTable:
+    """Columnar view of parsed elements.
+
+    Parallel arrays of type codes and original lines, plus offsets into one
+    text buffer holding every element text back to back.
+    """
+
+    __slots__ = ('types', 'lines', 'offsets', 'text')
+
+    def __init__(self, elements):
+        self.types = array('B')
+        self.lines = array('L')
+        self.offsets = array('L', [0])
+
+        texts = list()
+        offset = 0
+        for element in elements:
+            self.types.append(TYPE_CODES[element.element_type])
+            self.lines.append(element.original_line)
+            texts.append(element.element_text)
+            offset += len(element.element_text)
+            self.offsets.append(offset)
+
+        self.text = ''.join(texts)
+
+    def __len__(self):
+        return len(self.types)
+
+    def element_type(self, index):
+        return ELEMENT_TYPES[self.types[index]]
+
+    def element_text(self, index):
+        return self.text[self.offsets[index]:self.offsets[index + 1]]
+
+
+def _iter_chunks(string):
+    start = 0
+    while True:
+        end = string.find('\n', start)
+        if end < 0:
+            if start < len(string):
+                yield string[start:]
+            return
+        yield string[start:end + 1]
+        start = end + 1
+
+
+def _iter_mapped_chunks(path, encoding='utf-8'):
+    """Yield the lines of a file by scanning a memory map of it, with the
+    same newline translation as opening it in text mode"""
+
+    with open(path, 'rb') as fp:
+        if os.fstat(fp.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = 0
+            while start < len(mapped):
+                end = mapped.find(b'\n', start)
+                end = len(mapped) if end < 0 else end + 1
+                chunk = mapped[start:end].decode(encoding)
+                if '\r' in chunk:
+                    chunk = chunk.replace('\r\n', '\n').replace('\r', '\n')
+                yield chunk
+                start = end
+
+
+def _iter_lines(stream):
+    """Yield the lines of `contents.strip().replace('\r', '').splitlines()`
+    without holding the whole contents in memory."""
+
+    if isinstance(stream, str):
+        stream = _iter_chunks(stream)
+
+    previous = None
+    blanks = []
+
+    for chunk in stream:
+        for line in chunk.replace('\r', '').splitlines():
+            if not line or line.isspace():
+                if previous is not None:
+                    blanks.append(line)
+                continue
+
+            if previous is None:
+                line = line.lstrip()
+            else:
+                yield previous
+                yield from blanks
+                blanks = []
+            previous = line
+
+    if previous is not None:
+        yield previous.rstrip()
+
+
+def _with_next(iterable):
+    iterator = iter(iterable)
+    current = next(iterator, None)
+    while current is not None:
+        following = next(iterator, None)
+        yield current, following
+        current = following
+
+
+def iter_parse(stream):
+    """Parse a fountain string or file object, yielding its elements as they are finalised"""
+    return Fountain('').iter_elements(stream)
+
+
+def iter_parse_file(path, encoding='utf-8'):
+    """Parse a fountain file through a memory map, without reading it into a string"""
+    return Fountain('').iter_elements(_iter_mapped_chunks(path, encoding))
+
+
 class Fountain:
-    def __init__(self, string=None, path=None):
+    def __init__(self, string=None, path=None, memory_map=False, encoding='utf-8'):
         self.metadata = dict()
         self.elements = list()
 
+        if path and memory_map:
+            self.contents = None
+            self.elements.extend(
+                self.iter_elements(_iter_mapped_chunks(path, encoding)))
+            return
+
         if path:
             with open(path) as fp:
                 self.contents = fp.read()
@@ -52,19 +226,37 @@ class Fountain:
             self.parse()
 
     def parse(self):
-        contents = self.contents.strip().replace('\r', '')
+        self.elements.extend(self.iter_elements(self.contents))
+
+    def element_table(self):
+        return ElementTable(self.elements)
+
+    @property
+    def dual_dialogues(self):
+        """(first, second) Character pairs of every dual dialogue"""
+        return [(e.dual_partner, e) for e in self.elements if e.dual_partner]
+
+    def iter_elements(self, stream):
+        lines = _iter_lines(stream)
+        first = next(lines, None)
 
-        contents_has_metadata = ':' in contents.splitlines()[0]
-        contents_has_body = '\n\n' in contents
+        if first is None:
+            return
 
-        if contents_has_metadata and contents_has_body:
-            script_head, script_body = contents.split('\n\n', 1)
-            self._parse_head(script_head.splitlines())
-            self._parse_body(script_body.splitlines())
-        elif contents_has_metadata and not contents_has_body:
-            self._parse_head(contents.splitlines())
+        if ':' in first:
+            script_head = [first]
+            for line in lines:
+                if not line:
+                    break
+                script_head.append(line)
+            else:
+                self._parse_head(script_head)
+                return
+
+            self._parse_head(script_head)
+            yield from self._iter_body(lines)
         else:
-            self._parse_body(contents.splitlines())
+            yield from self._iter_body(chain([first], lines))
 
     def _parse_head(self, script_head):
         open_key = None
@@ -79,21 +271,37 @@ class Fountain:
                 key, value = line.split(':', 1)
                 self.metadata[key.strip().lower()] = [value.strip()]
 
-    def _parse_body(self, script_body):
+    def _iter_body(self, script_body):
+        """Yield body elements as they are finalised.
+
+        Only the last element is held back, as the following lines may still
+        be appended to it. Those continuation lines are buffered and joined
+        once the element is closed. A dual dialogue `^` cue flags its partner
+        Character even if that one was already yielded.
+        """
         is_comment_block = False
         is_inside_dialogue_block = False
         newlines_before = 0
-        index = -1
         comment_text = list()
+        elements = list()
+        last_character = None
+        open_element = None
+        open_lines = list()
 
-        for linenum, line in enumerate(script_body):
+        for linenum, (line, next_line) in enumerate(_with_next(script_body)):
             assert type(line) is str
-            index += 1
+            if len(elements) > 1:
+                if open_element is not None:
+                    open_element.element_text = '\n'.join(open_lines)
+                    open_element = None
+                yield from elements[:-1]
+                del elements[:-1]
+
             line = line.lstrip()
-            full_strip = line.strip()
+            full_strip = line.rstrip()
 
-            if (not line or line.isspace()) and not is_comment_block:
-                self.elements.append(FountainElement('Empty Line'))
+            if not line and not is_comment_block:
+                elements.append(EMPTY_LINE)
                 is_inside_dialogue_block = False
                 newlines_before += 1
                 continue
@@ -102,7 +310,7 @@ class Fountain:
                 line = line.rstrip()
                 if line.endswith('*/'):
                     text = line.replace('/*', '').replace('*/', '')
-                    self.elements.append(
+                    elements.append(
                         FountainElement(
                             'Boneyard',
                             text,
@@ -117,10 +325,10 @@ class Fountain:
                     comment_text.append('')
                 continue
 
-            if line.rstrip().endswith('*/'):
+            if '*/' in line and full_strip.endswith('*/'):
                 text = line.replace('*/', '')
                 comment_text.append(text.strip())
-                self.elements.append(
+                elements.append(
                     FountainElement(
                         'Boneyard',
                         '\n'.join(comment_text),
@@ -137,20 +345,23 @@ class Fountain:
                 comment_text.append(line)
                 continue
 
-            if line.startswith('==='):
-                self.elements.append(
-                    FountainElement(
-                        'Page Break',
-                        line,
-                        original_line=linenum,
-                        original_content=line
+            # most lines are ruled out by their first character alone
+            first = line[0]
+
+            if first == '=':
+                if line.startswith('==='):
+                    elements.append(
+                        FountainElement(
+                            'Page Break',
+                            line,
+                            original_line=linenum,
+                            original_content=line
+                        )
                     )
-                )
-                newlines_before = 0
-                continue
+                    newlines_before = 0
+                    continue
 
-            if len(full_strip) > 0 and full_strip[0] == '=':
-                self.elements.append(
+                elements.append(
                     FountainElement(
                         'Synopsis',
                         full_strip[1:].strip(),
@@ -160,25 +371,26 @@ class Fountain:
                 )
                 continue
 
-            if (
-                newlines_before > 0 and
-                full_strip.startswith('[[') and
-                full_strip.endswith(']]')
-            ):
-                self.elements.append(
-                    FountainElement(
-                        'Comment',
-                        full_strip.strip('[] \t'),
-                        original_line=linenum,
-                        original_content=line
+            elif first == '[':
+                if (
+                    newlines_before > 0 and
+                    full_strip.startswith('[[') and
+                    full_strip.endswith(']]')
+                ):
+                    elements.append(
+                        FountainElement(
+                            'Comment',
+                            full_strip.strip('[] \t'),
+                            original_line=linenum,
+                            original_content=line
+                        )
                     )
-                )
-                continue
+                    continue
 
-            if len(full_strip) > 0 and full_strip[0] == '#':
+            elif first == '#':
                 newlines_before = 0
                 depth = full_strip.split()[0].count('#')
-                self.elements.append(
+                elements.append(
                     FountainElement(
                         'Section Heading',
                         full_strip[depth:],
@@ -189,45 +401,48 @@ class Fountain:
                 )
                 continue
 
-            if len(line) > 1 and line[0] == '.' and line[1] != '.':
-                newlines_before = 0
-                if full_strip[-1] == '#' and full_strip.count('#') > 1:
-                    scene_number_start = len(full_strip) - \
-                        full_strip[::-1].find('#', 1) - 1
-                    self.elements.append(
-                        FountainElement(
-                            'Scene Heading',
-                            full_strip[1:scene_number_start].strip(),
-                            scene_number=full_strip[
-                                scene_number_start:
-                            ].strip('#').strip(),
-                            original_line=linenum,
-                            original_content=line
+            elif first == '.':
+                if len(line) > 1 and line[1] != '.':
+                    newlines_before = 0
+                    if full_strip[-1] == '#' and full_strip.count('#') > 1:
+                        scene_number_start = full_strip.rfind(
+                            '#', 0, len(full_strip) - 1)
+                        elements.append(
+                            FountainElement(
+                                'Scene Heading',
+                                full_strip[1:scene_number_start].strip(),
+                                scene_number=full_strip[
+                                    scene_number_start:
+                                ].strip('#').strip(),
+                                original_line=linenum,
+                                original_content=line
+                            )
                         )
-                    )
-                else:
-                    self.elements.append(
-                        FountainElement(
-                            'Scene Heading',
-                            full_strip[1:].strip(),
-                            original_line=linenum,
-                            original_content=line
+                    else:
+                        elements.append(
+                            FountainElement(
+                                'Scene Heading',
+                                full_strip[1:].strip(),
+                                original_line=linenum,
+                                original_content=line
+                            )
                         )
-                    )
-                continue
+                    continue
 
-            if (
-                line[0:4].upper() in
-                ['INT ', 'INT.', 'EXT ', 'EXT.', 'EST ', 'EST.', 'I/E ', 'I/E.'] or
-                line[0:8].upper() in ['INT/EXT ', 'INT/EXT.'] or
-                line[0:9].upper() in ['INT./EXT ', 'INT./EXT.']
+            elif (
+                (first in SCENE_HEADING_STARTS or first > '\x7f') and (
+                    line[0:4].upper() in SCENE_HEADING_PREFIXES or
+                    line[0:8].upper() in LONG_SCENE_HEADING_PREFIXES or
+                    line[0:9].upper() in LONGEST_SCENE_HEADING_PREFIXES
+                )
             ):
                 newlines_before = 0
-                scene_name_start = line.find(line.split()[1])
+                abbreviation, scene_name = line.split(None, 2)[:2]
+                scene_name_start = line.find(scene_name)
                 if full_strip[-1] == '#' and full_strip.count('#') > 1:
-                    scene_number_start = len(full_strip) - \
-                        full_strip[::-1].find('#', 1) - 1
-                    self.elements.append(
+                    scene_number_start = full_strip.rfind(
+                        '#', 0, len(full_strip) - 1)
+                    elements.append(
                         FountainElement(
                             'Scene Heading',
                             full_strip[
@@ -237,25 +452,27 @@ class Fountain:
                                 scene_number_start:
                             ].strip('#').strip(),
                             original_line=linenum,
-                            scene_abbreviation=line.split()[0],
+                            scene_abbreviation=abbreviation,
                             original_content=line
                         )
                     )
                 else:
-                    self.elements.append(
+                    elements.append(
                         FountainElement(
                             'Scene Heading',
                             full_strip[scene_name_start:].strip(),
                             original_line=linenum,
-                            scene_abbreviation=line.split()[0],
+                            scene_abbreviation=abbreviation,
                             original_content=line
                         )
                     )
                 continue
 
-            if full_strip.endswith(' TO:'):
+            last = full_strip[-1]
+
+            if last == ':' and full_strip.endswith(' TO:'):
                 newlines_before = 0
-                self.elements.append(
+                elements.append(
                     FountainElement(
                         'Transition',
                         full_strip,
@@ -265,9 +482,9 @@ class Fountain:
                 )
                 continue
 
-            if full_strip in COMMON_TRANSITIONS:
+            if last == '.' and full_strip in COMMON_TRANSITIONS:
                 newlines_before = 0
-                self.elements.append(
+                elements.append(
                     FountainElement(
                         'Transition',
                         full_strip,
@@ -277,10 +494,10 @@ class Fountain:
                 )
                 continue
 
-            if full_strip[0] == '>':
+            if first == '>':
                 newlines_before = 0
                 if len(full_strip) > 1 and full_strip[-1]:
-                    self.elements.append(
+                    elements.append(
                         FountainElement(
                             'Action',
                             full_strip[1:-1].strip(),
@@ -290,7 +507,7 @@ class Fountain:
                         )
                     )
                 else:
-                    self.elements.append(
+                    elements.append(
                         FountainElement(
                             'Transition',
                             full_strip[1:].strip(),
@@ -302,41 +519,37 @@ class Fountain:
 
             if (
                 newlines_before > 0 and
-                index + 1 < len(script_body) and
-                script_body[index + 1] and
-                not line[0] in ['[', ']', ',', '(', ')']
+                next_line and
+                first not in CHARACTER_EXCLUDED_STARTS
             ):
                 newlines_before = 0
-                if full_strip[-1] == '^':
-                    for element in reversed(self.elements):
-                        if element.element_type == 'Character':
-                            element.is_dual_dialogue = True
-                            break
-                    self.elements.append(
-                        FountainElement(
-                            'Character',
-                            full_strip.rstrip('^').strip(),
-                            is_dual_dialogue=True,
-                            original_line=linenum,
-                            original_content=line
-                        )
+                if last == '^':
+                    if last_character:
+                        last_character.is_dual_dialogue = True
+                    last_character = FountainElement(
+                        'Character',
+                        full_strip.rstrip('^').strip(),
+                        is_dual_dialogue=True,
+                        original_line=linenum,
+                        original_content=line,
+                        dual_partner=last_character
                     )
+                    elements.append(last_character)
                     is_inside_dialogue_block = True
                 else:
-                    self.elements.append(
-                        FountainElement(
-                            'Character',
-                            full_strip,
-                            original_line=linenum,
-                            original_content=line
-                        )
+                    last_character = FountainElement(
+                        'Character',
+                        full_strip,
+                        original_line=linenum,
+                        original_content=line
                     )
+                    elements.append(last_character)
                     is_inside_dialogue_block = True
                 continue
 
             if is_inside_dialogue_block:
-                if newlines_before == 0 and full_strip[0] == '(':
-                    self.elements.append(
+                if newlines_before == 0 and first == '(':
+                    elements.append(
                         FountainElement(
                             'Parenthetical',
                             full_strip,
@@ -345,12 +558,13 @@ class Fountain:
                         )
                     )
                 else:
-                    if self.elements[-1].element_type == 'Dialogue':
-                        self.elements[-1].element_text = '\n'.join(
-                            [self.elements[-1].element_text, full_strip]
-                        )
+                    if elements[-1].element_type == 'Dialogue':
+                        if elements[-1] is not open_element:
+                            open_element = elements[-1]
+                            open_lines = [open_element.element_text]
+                        open_lines.append(full_strip)
                     else:
-                        self.elements.append(
+                        elements.append(
                             FountainElement(
                                 'Dialogue',
                                 full_strip,
@@ -360,12 +574,14 @@ class Fountain:
                         )
                 continue
 
-            if newlines_before == 0 and len(self.elements) > 0:
-                self.elements[-1].element_text = '\n'.join(
-                    [self.elements[-1].element_text, full_strip])
+            if newlines_before == 0 and len(elements) > 0:
+                if elements[-1] is not open_element:
+                    open_element = elements[-1]
+                    open_lines = [open_element.element_text]
+                open_lines.append(full_strip)
                 newlines_before = 0
             else:
-                self.elements.append(
+                elements.append(
                     FountainElement(
                         'Action',
                         full_strip,
@@ -374,3 +590,7 @@ class Fountain:
                     )
                 )
                 newlines_before = 0
+
+        if open_element is not None:
+            open_element.element_text = '\n'.join(open_lines)
+        yield from elements
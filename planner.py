@@ -0,0 +1,891 @@
+"""Parsing and strip layout planning, free of bpy so it can run and be profiled outside Blender"""
+
+from bisect import bisect_right
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from difflib import SequenceMatcher
+from math import ceil, sqrt
+from threading import Lock
+from time import perf_counter
+import hashlib
+import re
+
+from fountain import (
+    LONG_SCENE_HEADING_PREFIXES,
+    LONGEST_SCENE_HEADING_PREFIXES,
+    SCENE_HEADING_PREFIXES,
+    iter_parse,
+    iter_parse_file,
+)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+spaces = re.compile(r'\s+')
+words_per_second = 3.75
+text_speed_factor = 1.2
+min_text_length = 1.5
+line_break_seconds = 0.3
+syllables_per_second = 5.25
+vowel_groups = re.compile(r'[aeiouy]+', re.IGNORECASE)
+dialogue_strip = re.compile(
+    r'^(?P<character>[^:(]+?)(?: (?P<parenthetical>\(.*?\)))?: (?P<text>.*)$', re.DOTALL)
+scene_padding_seconds = 1
+title_page_end = re.compile(r'\n\r*\n')
+
+Scene = namedtuple('Scene', ['name', 'elements'])
+Dialogue = namedtuple(
+    'Dialogue', ['seconds', 'character', 'parenthetical', 'text'])
+Action = namedtuple('Action', ['seconds', 'text'])
+DualDialogue = namedtuple('DualDialogue', ['seconds', 'left', 'right'])
+StripSpec = namedtuple(
+    'StripSpec', ['channel', 'frame_start', 'frame_end', 'text', 'style', 'scene', 'element',
+                  'character', 'parenthetical'],
+    defaults=(None, None, None, None))
+LayoutReport = namedtuple(
+    'LayoutReport', ['strips', 'plan_seconds', 'write_seconds'])
+BeatCard = namedtuple('BeatCard', ['scene', 'beat', 'x', 'y'])
+BoardReport = namedtuple(
+    'BoardReport', ['frames', 'plan_seconds', 'write_seconds'])
+
+card_width = 600
+card_height = 300
+card_margin = 50
+
+
+class ParseCache:
+    '''LRU cache of parsed scripts and their derived scenes, keyed by a hash of the script
+
+    Safe to share with worker threads; builds run outside the lock.
+    '''
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def key(self, script):
+        return hashlib.sha1(script.encode('utf-8')).hexdigest()
+
+    def get(self, script, kind, build):
+        key = self.key(script)
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                entry = self.entries[key] = {}
+                while len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+            else:
+                self.entries.move_to_end(key)
+
+            if kind in entry:
+                self.hits += 1
+                return entry[kind]
+
+            self.misses += 1
+
+        value = build()
+        with self.lock:
+            entry[kind] = value
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self.entries),
+                'maxsize': self.maxsize
+            }
+
+
+def script_elements(script):
+    """Elements of a script, parsed once and shared by every structure derived from it"""
+    return parse_cache.get(script, 'elements', lambda: list(iter_parse(script)))
+
+
+parse_cache = ParseCache()
+
+
+def to_frames_scenes(script):
+    return parse_cache.get(script, 'frames', lambda: frames_scenes_from(script_elements(script)))
+
+
+def frames_scenes_from(elements):
+    Scene = namedtuple('Scene', ['name', 'beats'])
+    Beat = namedtuple('Beat', ['name', 'lines'])
+
+    scenes = []
+
+    current_scene = None
+    current_beat = None
+
+    for f in elements:
+        element_type = f.element_type
+        text = f.element_text.strip()
+
+        if element_type == 'Scene Heading':
+
+            name = f.original_content.strip()
+            current_scene = Scene(name, [])
+            scenes.append(current_scene)
+            current_beat = None
+
+        elif not current_scene:
+            continue
+
+        elif element_type == 'Section Heading':
+            if f.section_depth < 2:
+                continue
+
+            current_beat = Beat(text, [])
+            current_scene.beats.append(current_beat)
+
+        elif element_type == 'Synopsis':
+            current_beat = Beat(text, [])
+            current_scene.beats.append(current_beat)
+
+        elif element_type == 'Empty Line' and not current_beat:
+            continue
+
+        else:
+            if not current_beat:
+                current_beat = Beat('', [])
+                current_scene.beats.append(current_beat)
+            current_beat.lines.append(text)
+
+    return scenes
+
+
+def word_count(text):
+    """The same count as `len(spaces.split(text))`, without running the regex"""
+    return (len(text.split()) + text[:1].isspace() + text[-1:].isspace()) or 1
+
+
+# every code point str.isspace() is true for lies below U+3001
+whitespace_table = numpy and numpy.array(
+    [chr(c).isspace() for c in range(0x3002)], dtype=bool)
+
+
+def text_counts(texts):
+    """Word counts, as `word_count` gives them, and line breaks of many texts
+
+    With NumPy the texts are scanned as one array of code points, and words
+    are counted from whitespace to non whitespace transitions, so no token
+    lists are built. Without it, `str.split` in C is still faster than any
+    per character loop in Python.
+    """
+    if numpy is None or not texts:
+        return [word_count(t) for t in texts], [t.count('\n') for t in texts]
+
+    # a leading space and the separators are whitespace, so every word starts
+    # after a whitespace and none runs from one text into the next
+    codes = numpy.frombuffer(
+        (' ' + ' '.join(texts)).encode('utf-32-le', 'surrogatepass'), dtype=numpy.uint32)
+    space = (codes - 9 <= 4) | (codes - 28 <= 4)
+    wide = numpy.flatnonzero(codes > 127)
+    if len(wide):
+        space[wide] = whitespace_table[numpy.minimum(codes[wide], len(whitespace_table) - 1)]
+
+    word_starts = numpy.flatnonzero(~space[1:] & space[:-1]) + 1
+    line_breaks = numpy.flatnonzero(codes == 10)
+
+    lengths = numpy.fromiter(map(len, texts), dtype=numpy.intp, count=len(texts))
+    ends = numpy.cumsum(lengths + 1)
+    begins = ends - lengths
+
+    def within(positions):
+        return numpy.searchsorted(positions, ends) - numpy.searchsorted(positions, begins)
+
+    # a text that starts or ends with whitespace counts one more, like `spaces.split`
+    filled = lengths > 0
+    words = (within(word_starts) +
+             (filled & space[numpy.minimum(begins, len(space) - 1)]) + (filled & space[ends - 1]))
+    words[words == 0] = 1
+
+    return words, within(line_breaks)
+
+
+def text_to_seconds(text):
+    words = word_count(text)
+    return max(min_text_length, round(words / words_per_second + line_break_seconds * text.count('\n'), 2))
+
+
+def texts_to_seconds(texts, factor=1):
+    """Reading times for many texts at once, matching `text_to_seconds(text) * factor`"""
+    words, breaks = text_counts(texts)
+
+    if numpy is not None and texts:
+        raw = (words / words_per_second + line_break_seconds * breaks).tolist()
+    else:
+        raw = [w / words_per_second + line_break_seconds * b
+               for w, b in zip(words, breaks)]
+
+    return [max(min_text_length, round(r, 2)) * factor for r in raw]
+
+
+def syllable_count(text):
+    return sum(max(1, len(vowel_groups.findall(w))) for w in text.split()) or 1
+
+
+class TimingModel:
+    """Default timing: every character reads at `words_per_second`
+
+    Models turn batches of texts into seconds; `key` tells cached
+    layouts made with different models apart.
+    """
+
+    def key(self):
+        return ('words',)
+
+    def dialogue_seconds(self, texts, characters):
+        return texts_to_seconds(texts, text_speed_factor)
+
+    def action_seconds(self, texts):
+        return texts_to_seconds(texts)
+
+
+class SyllableTimingModel(TimingModel):
+    """Time dialogue by counting syllables instead of words"""
+
+    def key(self):
+        return ('syllables',)
+
+    def dialogue_seconds(self, texts, characters):
+        return [
+            max(min_text_length, round(syllable_count(t) / syllables_per_second +
+                line_break_seconds * t.count('\n'), 2)) * text_speed_factor
+            for t in texts
+        ]
+
+
+class CalibratedTimingModel(TimingModel):
+    """Time dialogue with per character rates, in words per second, learnt from edited strips"""
+
+    def __init__(self, rates, fallback=None):
+        self.rates = dict(rates)
+        self.fallback = fallback or TimingModel()
+
+    def key(self):
+        return ('calibrated', tuple(sorted(self.rates.items())), self.fallback.key())
+
+    def dialogue_seconds(self, texts, characters):
+        seconds = self.fallback.dialogue_seconds(texts, characters)
+        for i, (text, character) in enumerate(zip(texts, characters)):
+            rate = self.rates.get(character)
+            if rate:
+                seconds[i] = max(min_text_length, round(
+                    word_count(text) / rate + line_break_seconds * text.count('\n'), 2))
+        return seconds
+
+
+def calibrate_rates(samples):
+    """Words per second for each character, from (character, text, seconds) samples"""
+    words = {}
+    seconds = {}
+
+    for character, text, duration in samples:
+        speaking = duration - line_break_seconds * text.count('\n')
+        if speaking <= 0:
+            continue
+        words[character] = words.get(character, 0) + word_count(text)
+        seconds[character] = seconds.get(character, 0) + speaking
+
+    return {c: round(words[c] / seconds[c], 3) for c in words}
+
+
+default_timing_model = TimingModel()
+
+
+def to_vse_scenes(script, model=default_timing_model):
+    return script_index(script, model).scenes
+
+
+def vse_scenes_from(elements, model=default_timing_model, sources=None):
+    """Scenes of dialogues and actions, timed by `model`
+
+    If a `sources` list is given, it receives the heading line of each scene
+    and, for each of its elements, the lines it was parsed from.
+    """
+    scenes = []
+    dialogues = []
+    actions = []
+    duals = []
+
+    current_scene = None
+    current_char = None
+    current_char_element = None
+    current_parenthetical = ''
+    last_dialogue = None
+    cue_line = None
+
+    for f in elements:
+        element_type = f.element_type
+        text = f.element_text.strip()
+
+        if element_type == 'Scene Heading':
+            name = f.original_content.strip()
+            current_scene = Scene(name, [])
+            scenes.append(current_scene)
+            last_dialogue = None
+            if sources is not None:
+                sources.append((f.original_line, []))
+
+        elif not current_scene:
+            continue
+
+        elif element_type == 'Parenthetical':
+            current_parenthetical = text
+            if cue_line is None:
+                cue_line = f.original_line
+
+        elif element_type == 'Character':
+            current_char = text
+            current_char_element = f
+            cue_line = f.original_line
+
+        elif element_type == 'Dialogue':
+            partner = current_char_element and current_char_element.dual_partner
+
+            lines = [f.original_line if cue_line is None else cue_line]
+            cue_line = None
+
+            # only a dialogue that is still the last element of this scene can be paired
+            if (
+                partner and last_dialogue and last_dialogue[0] is partner and
+                last_dialogue[1] is current_scene.elements and
+                last_dialogue[2] == len(current_scene.elements) - 1
+            ):
+                # the second speaker of a dual dialogue is held aside and
+                # paired with the first one once both are timed
+                target, index = [None], 0
+                duals.append((last_dialogue[1], last_dialogue[2], target))
+                last_dialogue[3].extend(lines)
+            else:
+                target, index = current_scene.elements, len(current_scene.elements)
+                current_scene.elements.append(None)
+                if sources is not None:
+                    sources[-1][1].append(lines)
+
+            dialogues.append((
+                target,
+                index,
+                current_char,
+                current_parenthetical,
+                text
+            ))
+            last_dialogue = (current_char_element, target, index, lines)
+            current_parenthetical = ''
+
+        elif current_scene and element_type == 'Action':
+            actions.append((
+                current_scene.elements,
+                len(current_scene.elements),
+                text
+            ))
+            current_scene.elements.append(None)
+            last_dialogue = None
+            if sources is not None:
+                sources[-1][1].append([f.original_line])
+
+    # time every dialogue and action in one go, then fill in their slots
+    seconds = model.dialogue_seconds(
+        [d[-1] for d in dialogues], [d[2] for d in dialogues])
+    for (target, index, character, parenthetical, text), s in zip(dialogues, seconds):
+        target[index] = Dialogue(s, character, parenthetical, text)
+
+    seconds = model.action_seconds([a[-1] for a in actions])
+    for (target, index, text), s in zip(actions, seconds):
+        target[index] = Action(s, text)
+
+    for target, index, second in duals:
+        left, right = target[index], second[0]
+        target[index] = DualDialogue(
+            max(left.seconds, right.seconds), left, right)
+
+    return scenes
+
+
+def body_first_line(script):
+    """Line of the script text that `original_line` counts from, past leading blank lines and the title page"""
+    body = script.lstrip()
+    first_line = script[:len(script) - len(body)].count('\n')
+
+    if ':' not in body.partition('\n')[0]:
+        return first_line
+
+    end = title_page_end.search(body)
+    if not end:
+        return first_line
+
+    return first_line + body.count('\n', 0, end.start()) + 2
+
+
+class ScriptIndex:
+    """Lookup tables over the scenes of a script, built once per parse
+
+    Lines count from the top of the script text, as in the text editor. Scenes
+    and elements are referred to by their position in `scenes` and in their
+    scene's elements, like the `scene` and `element` of a `StripSpec`.
+    """
+
+    def __init__(self, scenes, sources, first_line=0):
+        self.scenes = scenes
+        self.spans = scene_spans(scenes)
+        self.scene_lines = [first_line + line for line, _ in sources]
+        self.scene_ids = occurrence_ids(s.name for s in scenes)
+        self.element_lines = {}
+        self.characters = {}
+
+        located = []
+        for i, (scene, (_, lines)) in enumerate(zip(scenes, sources)):
+            for k, (e, element_lines) in enumerate(zip(scene.elements, lines)):
+                self.element_lines[i, k] = first_line + element_lines[0]
+                located.extend((first_line + line, i, k) for line in element_lines)
+
+                speakers = (e.left, e.right) if type(e) is DualDialogue else (e,)
+                for d in speakers:
+                    if type(d) is Dialogue:
+                        self.characters.setdefault(d.character, []).append((i, k))
+
+        located.sort()
+        self.lines = [line for line, _, _ in located]
+        self.elements = [(i, k) for _, i, k in located]
+
+    def scene_at(self, line):
+        """Index of the scene a line belongs to, None above the first heading"""
+        i = bisect_right(self.scene_lines, line) - 1
+        return None if i < 0 else i
+
+    def element_at(self, line):
+        """Scene and element a line belongs to; the element is None on a scene heading"""
+        i = self.scene_at(line)
+        if i is None:
+            return None
+
+        j = bisect_right(self.lines, line) - 1
+        if j < 0 or self.elements[j][0] != i:
+            return i, None
+
+        return self.elements[j]
+
+    def line_of(self, scene, element=None):
+        if element is None:
+            return self.scene_lines[scene]
+        return self.element_lines[scene, element]
+
+    def scene_seconds(self, scene):
+        start, end = self.spans[scene]
+        return end - start
+
+    def scenes_with(self, character):
+        return sorted({i for i, _ in self.characters.get(character, ())})
+
+
+class FrameIndex:
+    """Source lines of strips by frame, and the first frame of each source line
+
+    Built from (frame start, frame end, line, is scene strip) intervals. Scene
+    strips do not overlap each other, and neither do the others, so a frame is
+    found with a bisection per kind, the scene strips only as a fallback.
+    """
+
+    def __init__(self, intervals):
+        intervals = sorted(intervals)
+        self.levels = []
+        for scene in (False, True):
+            level = [i for i in intervals if i[3] == scene]
+            self.levels.append((
+                [i[0] for i in level],
+                [i[1] for i in level],
+                [i[2] for i in level]
+            ))
+
+        self.frames = {}
+        for start, _, line, _ in intervals:
+            self.frames.setdefault(line, start)
+
+    def line_at(self, frame):
+        for starts, ends, lines in self.levels:
+            j = bisect_right(starts, frame) - 1
+            if j >= 0 and frame < ends[j]:
+                return lines[j]
+        return None
+
+    def frame_of(self, line):
+        return self.frames.get(line)
+
+
+def script_index(script, model=default_timing_model):
+    """Scenes of a script along with their `ScriptIndex`, cached like `to_vse_scenes`"""
+    def build():
+        sources = []
+        scenes = vse_scenes_from(script_elements(script), model, sources)
+        return ScriptIndex(scenes, sources, body_first_line(script))
+
+    return parse_cache.get(script, ('index', model.key()), build)
+
+
+def scene_fingerprint(scene):
+    return hashlib.md5(repr(scene).encode('utf-8')).hexdigest()
+
+
+def scene_length(s, padding=scene_padding_seconds):
+    """Length of a scene, summed in the same order as `plan_scene` does"""
+    total = padding
+    for e in s.elements:
+        total = total + e.seconds
+    return total + padding
+
+
+def scene_spans(scenes, padding=scene_padding_seconds):
+    spans = []
+    next = 0
+
+    for s in scenes:
+        end = next + scene_length(s, padding)
+        spans.append((next, end))
+        next = end
+
+    return spans
+
+
+def seconds_to_frames(seconds, fps):
+    return ceil(fps * seconds)
+
+
+def scene_frame_spans(scenes, fps, padding=scene_padding_seconds):
+    """Start and end frames of every scene
+
+    Each scene is rounded up to whole frames on its own and the scenes follow
+    one another, so moving a scene by whole frames lays it out exactly as
+    planning it again at its new start would.
+    """
+    spans = []
+    next = 0
+
+    for s in scenes:
+        length = seconds_to_frames(scene_length(s, padding), fps)
+        spans.append((next, next + length))
+        next += length
+
+    return spans
+
+
+def relayout_plan(previous, scenes, spans):
+    """How to turn a stored layout into the layout of `scenes`
+
+    `previous` holds the fingerprint, start and end frame of every scene of the
+    stored layout, `spans` the frame spans of the new one. Returns the indexes
+    of the scenes to plan again, the (previous index, new index, frame delta)
+    of the scenes kept, and the frame spans of the stored scenes to remove.
+    """
+    matcher = SequenceMatcher(
+        None, [p[0] for p in previous], [scene_fingerprint(s) for s in scenes],
+        autojunk=False)
+
+    created = []
+    kept = []
+    removed = []
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            for i, j in zip(range(i1, i2), range(j1, j2)):
+                kept.append((i, j, spans[j][0] - previous[i][1]))
+        else:
+            removed.extend(tuple(p[1:3]) for p in previous[i1:i2])
+            created.extend(range(j1, j2))
+
+    return created, kept, removed
+
+
+class ChannelIndex:
+    """Strips grouped by channel, built with a single pass over the sequences"""
+
+    def __init__(self, strips):
+        self.channels = {}
+        for s in strips:
+            self.channels.setdefault(s.channel, []).append(s)
+
+    def top(self):
+        return max(self.channels, default=0)
+
+    def first_free_band(self, height=3, start=1):
+        channel = start
+        while True:
+            taken = [c for c in range(channel, channel + height) if c in self.channels]
+            if not taken:
+                return channel
+            channel = taken[-1] + 1
+
+    def strips_in(self, first, last):
+        return [s for c in range(first, last + 1) for s in self.channels.get(c, ())]
+
+    def discard(self, strips):
+        for s in strips:
+            in_channel = self.channels.get(s.channel)
+            if in_channel is None:
+                continue
+            in_channel.remove(s)
+            if not in_channel:
+                del self.channels[s.channel]
+
+
+def dialogue_text(d):
+    return '{}{}: {}'.format(d.character, (
+        d.parenthetical and ' ' + d.parenthetical), d.text)
+
+
+def is_scene_heading(line):
+    return (
+        line[0:4].upper() in SCENE_HEADING_PREFIXES or
+        line[0:8].upper() in LONG_SCENE_HEADING_PREFIXES or
+        line[0:9].upper() in LONGEST_SCENE_HEADING_PREFIXES
+    )
+
+
+def paragraph_lines(text):
+    return [line.strip() for line in text.split('\n') if line.strip()]
+
+
+def strip_dialogue(text, character=None, parenthetical=None):
+    """Character, parenthetical and speech of a dialogue strip, or None
+
+    The character and parenthetical stamped on the strip are trusted as long
+    as the text still starts with them; otherwise the text is split with
+    `dialogue_strip`, which cannot tell a parenthetical apart from a
+    character extension such as `(V.O.)`.
+    """
+    if character is not None:
+        prefix = '{}{}: '.format(character, parenthetical and ' ' + parenthetical)
+        if text.startswith(prefix):
+            return character, parenthetical, text[len(prefix):]
+
+    match = dialogue_strip.match(text)
+    return match and (
+        match.group('character').strip(), match.group('parenthetical'), match.group('text'))
+
+
+def dialogue_block(dialogue, dual=False):
+    character, parenthetical, text = dialogue
+    lines = [character + (' ^' if dual else '')]
+    if parenthetical:
+        lines.append(parenthetical)
+    lines.extend(paragraph_lines(text))
+    return '\n'.join(lines) + '\n\n'
+
+
+def iter_fountain(strips, channel):
+    """Fountain blocks for text strips in the channels of a layout, in play order
+
+    `strips` are (frame start, channel, text, character, parenthetical)
+    tuples, the last two None when the strip does not carry them. The scene channel gives
+    the scene headings, the next one the dialogue and the one after the
+    actions, or the second speaker of a dual dialogue when a dialogue starts
+    along with it. Headings that would not be recognised are forced with a
+    `.`; as the parser has no forced actions, every line of an action is
+    written as a paragraph of its own so none is taken for a character cue.
+    """
+    dialogue_start = None
+
+    strips = sorted((s for s in strips if channel <= s[1] <= channel + 2), key=lambda s: s[:3])
+
+    for start, strip_channel, text, character, parenthetical in strips:
+        if strip_channel == channel:
+            heading = text.strip()
+            if not heading.startswith('.') and not is_scene_heading(heading):
+                heading = '.' + heading
+            yield heading + '\n\n'
+            continue
+
+        dialogue = strip_dialogue(text, character, parenthetical)
+        if dialogue and strip_channel == channel + 1:
+            dialogue_start = start
+            yield dialogue_block(dialogue)
+        elif dialogue and start == dialogue_start:
+            yield dialogue_block(dialogue, dual=True)
+        else:
+            lines = paragraph_lines(text)
+            if lines:
+                yield '\n\n'.join(lines) + '\n\n'
+
+
+def plan_scene(s, channel, next, fps, padding=scene_padding_seconds, index=None):
+    """Strip specs of a scene starting at frame `next`"""
+    specs = []
+    total = padding
+
+    for k, e in enumerate(s.elements):
+        start = total
+        end = total + e.seconds
+
+        element_type = type(e)
+        if element_type is Dialogue:
+            specs.append(StripSpec(
+                channel + 1,
+                next + seconds_to_frames(start, fps),
+                next + seconds_to_frames(end, fps),
+                dialogue_text(e),
+                'dialogue',
+                index,
+                k,
+                e.character,
+                e.parenthetical
+            ))
+
+        elif element_type is Action:
+            specs.append(StripSpec(
+                channel + 2,
+                next + seconds_to_frames(start, fps),
+                next + seconds_to_frames(end, fps),
+                e.text,
+                'action',
+                index,
+                k
+            ))
+
+        elif element_type is DualDialogue:
+            # both speakers run in parallel, the second one on the action channel
+            for offset, d, style in ((1, e.left, 'dual_left'), (2, e.right, 'dual_right')):
+                specs.append(StripSpec(
+                    channel + offset,
+                    next + seconds_to_frames(start, fps),
+                    next + seconds_to_frames(start + d.seconds, fps),
+                    dialogue_text(d),
+                    style,
+                    index,
+                    k,
+                    d.character,
+                    d.parenthetical
+                ))
+
+        total = end
+
+    total += padding
+
+    specs.append(StripSpec(
+        channel,
+        next,
+        next + seconds_to_frames(total, fps),
+        s.name,
+        'scene',
+        index
+    ))
+    return specs
+
+
+def file_vse_scenes(path, model=default_timing_model):
+    """Scenes of a fountain file on disk, parsed through a memory map"""
+    return vse_scenes_from(iter_parse_file(path), model)
+
+
+def parse_episode(script=None, path=None, model=default_timing_model):
+    """Scenes of one script, given as text or as a file path, and the seconds it took to parse
+
+    Runs in worker processes, so it only touches this module and `fountain`.
+    """
+    started = perf_counter()
+    if path:
+        scenes = file_vse_scenes(path, model)
+    else:
+        scenes = vse_scenes_from(iter_parse(script), model)
+    return scenes, perf_counter() - started
+
+
+def parse_episodes(jobs, model=default_timing_model, processes=None):
+    """Parse many scripts in a process pool, keeping their order; falls back to parsing in turn"""
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [pool.submit(parse_episode, model=model, **job) for job in jobs]
+            return [f.result() for f in futures]
+    except (OSError, BrokenProcessPool):
+        return [parse_episode(model=model, **job) for job in jobs]
+
+
+def plan_episodes(episodes, channel, fps, gap, padding=scene_padding_seconds):
+    """Strip specs for several scripts laid out one after another, `gap` seconds apart"""
+    specs = []
+    next = 0
+
+    for scenes in episodes:
+        spans = scene_frame_spans(scenes, fps, padding)
+        for i, (s, (start, _)) in enumerate(zip(scenes, spans)):
+            specs.extend(plan_scene(s, channel, next + start, fps, padding, i))
+        if spans:
+            next += spans[-1][1] + seconds_to_frames(gap, fps)
+
+    return specs
+
+
+def plan_layout(scenes, channel, fps, fps_base=1, padding=scene_padding_seconds):
+    """Turn scenes into the strip specs of a full layout starting at frame 0"""
+    fps = fps / fps_base
+    spans = scene_frame_spans(scenes, fps, padding)
+    return [
+        spec for i, (s, (start, _)) in enumerate(zip(scenes, spans))
+        for spec in plan_scene(s, channel, start, fps, padding, i)
+    ]
+
+
+def occurrence_ids(names):
+    """Names plus an occurrence count, stable as long as the names before them are"""
+    seen = {}
+    ids = []
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        ids.append('{}#{}'.format(name, seen[name]))
+    return ids
+
+
+def board_ids(scenes):
+    """Stable ids for the scenes and beats of a board: their names plus an occurrence count"""
+    seen = {}
+
+    def occurrence(name):
+        seen[name] = seen.get(name, 0) + 1
+        return '{}#{}'.format(name, seen[name])
+
+    ids = []
+    for scene in scenes:
+        scene_id = occurrence(scene.name)
+        ids.append((
+            scene_id,
+            [occurrence('{}/{}'.format(scene_id, beat.name)) for beat in scene.beats]
+        ))
+
+    return ids
+
+
+def plan_board(scenes, origin=(0, 0)):
+    """Grid positions for the beat frames of `to_frames_scenes`, one column per `side` scenes"""
+    side = ceil(sqrt(len(scenes)))
+    rows = [0 for _ in range(side)]
+    cards = []
+
+    for i, scene in enumerate(scenes):
+        column = i // side
+
+        for j, beat in enumerate(scene.beats):
+            cards.append(BeatCard(
+                i,
+                j,
+                origin[0] + column * (card_width + card_margin * 4),
+                origin[1] - (rows[column] * (card_height + card_margin) + (i % side * card_margin))
+            ))
+            rows[column] += 1
+
+    return cards
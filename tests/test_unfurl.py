@@ -0,0 +1,216 @@
+"""Headless checks of the parser and the layout planning, without bpy: run `pytest` from the repository root,
+or `python tests/test_unfurl.py`"""
+
+from collections import namedtuple
+import json
+import os
+import random
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+fixtures = os.path.join(root, 'fixtures')
+
+from fountain import ELEMENT_TYPES, ElementTable, Fountain, iter_parse
+from planner import (
+    ChannelIndex,
+    Dialogue,
+    DualDialogue,
+    ParseCache,
+    iter_fountain,
+    plan_layout,
+    plan_scene,
+    relayout_plan,
+    scene_fingerprint,
+    scene_frame_spans,
+    script_index,
+    text_counts,
+    to_frames_scenes,
+    to_vse_scenes,
+    vse_scenes_from,
+)
+import planner
+
+
+golden_attributes = [
+    'element_type', 'element_text', 'section_depth', 'scene_number', 'scene_abbreviation',
+    'is_centered', 'is_dual_dialogue', 'original_line', 'original_content',
+]
+
+
+def test_parser_matches_golden_output():
+    """fixtures/golden.json holds what the parser made of each fixture script
+    before its line classification dispatched on the first character"""
+    with open(os.path.join(fixtures, 'golden.json'), encoding='utf-8') as f:
+        golden = json.load(f)
+
+    for corpus, outputs in golden.items():
+        path = os.path.join(fixtures, corpus)
+        with open(path, encoding='utf-8', newline='') as f:
+            script = f.read()
+
+        parsed = {
+            'lf': Fountain(script),
+            'crlf': Fountain(script.replace('\n', '\r\n')),
+            'mapped': Fountain(path=path, memory_map=True),
+        }
+        for name, fountain in parsed.items():
+            expected = outputs['crlf' if name == 'crlf' else 'lf']
+            assert fountain.metadata == expected['metadata'], (corpus, name)
+            elements = [[getattr(e, a) for a in golden_attributes] for e in fountain.elements]
+            assert len(elements) == len(expected['elements']), (corpus, name)
+            for i, (element, wanted) in enumerate(zip(elements, expected['elements'])):
+                assert element == wanted, (corpus, name, i, element, wanted)
+
+
+def test_element_table_matches_the_elements():
+    with open(os.path.join(fixtures, 'golden.fountain'), encoding='utf-8') as f:
+        fountain = Fountain(f.read())
+    elements = fountain.elements
+
+    table = fountain.element_table()
+    assert len(table) == len(elements)
+    for i, e in enumerate(elements):
+        assert table.element_type(i) == e.element_type
+        assert ELEMENT_TYPES[table.types[i]] == e.element_type == ELEMENT_TYPES[e.type_code]
+        assert table.element_text(i) == e.element_text
+        assert table.lines[i] == e.original_line
+
+    streamed = ElementTable(iter_parse(fountain.contents))
+    assert (streamed.types, streamed.lines, streamed.offsets, streamed.text) == (
+        table.types, table.lines, table.offsets, table.text)
+
+
+def test_dual_dialogue_pairs_within_a_scene():
+    scenes = vse_scenes_from(iter_parse('INT. A\n\nALICE\nHi.\n\nBOB ^\nYo.\n'))
+    assert [type(e) for e in scenes[0].elements] == [DualDialogue]
+
+
+def test_dual_dialogue_does_not_pair_across_scenes_or_actions():
+    script = 'INT. A\n\nALICE\nHi.\n\nShe leaves.\n\nINT. B\n\nBOB ^\nYo.\n'
+    scenes = vse_scenes_from(iter_parse(script))
+    assert [len(s.elements) for s in scenes] == [2, 1]
+    assert type(scenes[1].elements[0]) is Dialogue
+
+
+def test_derived_structures_share_one_parse():
+    parses = []
+
+    def counting_parse(script):
+        parses.append(script)
+        return iter_parse(script)
+
+    planner.iter_parse, planner.parse_cache = counting_parse, ParseCache()
+    try:
+        script = 'INT. A\n\nALICE\nHi.\n\n## beat\n\nShe leaves.\n'
+        script_index(script)
+        to_frames_scenes(script)
+        to_vse_scenes(script)
+        assert len(parses) == 1
+    finally:
+        planner.iter_parse, planner.parse_cache = iter_parse, ParseCache()
+
+
+def random_scene(rng, n):
+    lines = ['INT. ROOM {} - DAY'.format(n), '']
+    for k in range(rng.randint(1, 6)):
+        if rng.random() < 0.3:
+            lines += ['Someone walks in, {}.'.format(' slowly' * rng.randint(1, 9)), '']
+        else:
+            lines += ['ALICE', ' '.join(['word'] * rng.randint(1, 40)), '']
+    return '\n'.join(lines)
+
+
+def relayout(specs, previous, scenes, channel, fps):
+    """Strip specs after an incremental relayout, shifting the kept scenes by whole frames"""
+    spans = scene_frame_spans(scenes, fps)
+    created, kept, removed = relayout_plan(previous, scenes, spans)
+    moved = {i: delta for i, _, delta in kept}
+    result = [
+        spec._replace(frame_start=spec.frame_start + moved[spec.scene],
+                      frame_end=spec.frame_end + moved[spec.scene])
+        for spec in specs if spec.scene in moved
+    ]
+    for j in created:
+        result.extend(plan_scene(scenes[j], channel, spans[j][0], fps))
+    return result, spans
+
+
+def test_incremental_layout_matches_full_layout():
+    rng = random.Random(7)
+    for fps in (24, 25, 30000 / 1001, 24000 / 1001):
+        texts = [random_scene(rng, n) for n in range(12)]
+        scenes = vse_scenes_from(iter_parse('\n\n'.join(texts)))
+        specs = plan_layout(scenes, 1, fps)
+        spans = scene_frame_spans(scenes, fps)
+
+        for edit in range(30):
+            n = rng.randrange(len(texts))
+            if rng.random() < 0.5 or len(texts) < 3:
+                texts.insert(n, random_scene(rng, 100 + edit))
+            elif rng.random() < 0.5:
+                texts[n] = random_scene(rng, 100 + edit)
+            else:
+                del texts[n]
+
+            previous = [(scene_fingerprint(s), start, end) for s, (start, end) in zip(scenes, spans)]
+            scenes = vse_scenes_from(iter_parse('\n\n'.join(texts)))
+            specs, spans = relayout(specs, previous, scenes, 1, fps)
+            # renumber the scenes the way a fresh plan would
+            specs = [
+                spec._replace(scene=j)
+                for j, (start, end) in enumerate(spans)
+                for spec in specs if start <= spec.frame_start < end
+            ]
+
+            full = plan_layout(scenes, 1, fps)
+            assert sorted(specs) == sorted(full), (fps, edit)
+
+            for channel in (1, 2, 3):
+                frames = sorted(
+                    (s.frame_start, s.frame_end) for s in full if s.channel == channel)
+                assert all(a[1] <= b[0] for a, b in zip(frames, frames[1:])), (fps, edit)
+
+
+def test_fountain_keeps_character_extensions_and_colons():
+    script = (
+        'INT. A\n\nCAROL (V.O.)\nHi: there.\n\nDAN\n(whispering: low)\nYo.\n\n'
+        'EVE (O.S.)\nLeft.\n\nFRED ^\n(loud)\nRight.\n\nShe leaves.\n'
+    )
+    scenes = vse_scenes_from(iter_parse(script))
+    specs = plan_layout(scenes, 1, 24)
+    strips = [(s.frame_start, s.channel, s.text, s.character, s.parenthetical) for s in specs]
+
+    written = ''.join(iter_fountain(strips, 1))
+    assert vse_scenes_from(iter_parse(written)) == scenes, written
+
+
+def test_first_free_band_skips_taken_channels():
+    Strip = namedtuple('Strip', 'channel')
+    index = ChannelIndex(Strip(c) for c in (1, 5, 9))
+    assert index.first_free_band(3) == 2
+    assert index.first_free_band(4) == 10
+    assert ChannelIndex(Strip(c) for c in (1, 3, 5, 9)).first_free_band(3) == 6
+
+
+def test_text_counts_match_word_count():
+    rng = random.Random(8)
+    alphabet = ['a', 'b', ' ', '\n', '\t', '\r', '\xa0', '\u3000', '\u200b', '\xe9', '\U0001f600']
+    for _ in range(500):
+        texts = [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+                 for _ in range(rng.randint(1, 8))]
+        words, breaks = text_counts(texts)
+        assert list(words) == [len(planner.spaces.split(t)) for t in texts], texts
+        assert list(breaks) == [t.count('\n') for t in texts], texts
+
+
+def run():
+    tests = [(name, f) for name, f in sorted(globals().items()) if name.startswith('test_')]
+    for name, test in tests:
+        test()
+        print('ok', name)
+    print('{} passed'.format(len(tests)))
+
+
+if __name__ == '__main__':
+    run()